@@ -2,21 +2,45 @@
 """Interactive script to manually test MCP server tools"""
 
 import asyncio
-import json
-import subprocess
 import sys
 
+from mcp_llm_bridge._json import dumps, loads
+
+# Allow large tool responses (full conversation dumps) on a single line
+STREAM_LIMIT = 16 * 1024 * 1024
+
 
 async def send_jsonrpc_request(proc, request):
-    """Send a JSON-RPC request and get response"""
-    request_str = json.dumps(request) + "\n"
-    proc.stdin.write(request_str)
-    proc.stdin.flush()
-
-    response_line = proc.stdout.readline()
-    if response_line:
-        return json.loads(response_line.strip())
-    return None
+    """Send a JSON-RPC request (or a list of requests) and get response(s)
+
+    A list of requests is pipelined: all frames are written with a single
+    write/flush and the responses are returned in request order, matched by id.
+    The stdio transport reads one message per line, so frames are sent
+    newline-delimited rather than as a JSON-RPC batch array. Only pipeline
+    once the initialize handshake has completed; the server rejects other
+    requests before that.
+    """
+    requests = request if isinstance(request, list) else [request]
+    proc.stdin.write(b"".join(dumps(r) + b"\n" for r in requests))
+    await proc.stdin.drain()
+
+    responses = {}
+    for _ in requests:
+        response_line = await proc.stdout.readline()
+        if not response_line:
+            break
+        response = loads(response_line)
+        responses[response.get("id")] = response
+
+    if isinstance(request, list):
+        return [responses.get(r.get("id")) for r in requests]
+    return responses.get(request.get("id"))
+
+
+async def send_jsonrpc_notification(proc, method):
+    """Send a JSON-RPC notification, which gets no response"""
+    proc.stdin.write(dumps({"jsonrpc": "2.0", "method": method}) + b"\n")
+    await proc.stdin.drain()
 
 
 async def interactive_session():
@@ -25,16 +49,18 @@ async def interactive_session():
     print("=" * 60)
 
     # Start the server
-    proc = subprocess.Popen(
-        [sys.executable, "-m", "mcp_llm_bridge.server"],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "mcp_llm_bridge.server",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        limit=STREAM_LIMIT,
     )
 
     try:
-        # Initialize
+        # The handshake has to complete before any other request
         print("\n📡 Initializing server...")
         init_request = {
             "jsonrpc": "2.0",
@@ -46,15 +72,14 @@ async def interactive_session():
                 "clientInfo": {"name": "interactive-client", "version": "1.0.0"},
             },
         }
-
         response = await send_jsonrpc_request(proc, init_request)
         if response and "result" in response:
             print("✅ Server initialized successfully")
         else:
             print("❌ Failed to initialize server")
             return
+        await send_jsonrpc_notification(proc, "notifications/initialized")
 
-        # List available tools
         print("\n🔧 Listing available tools...")
         tools_request = {
             "jsonrpc": "2.0",
@@ -62,10 +87,9 @@ async def interactive_session():
             "method": "tools/list",
             "params": {},
         }
-
-        response = await send_jsonrpc_request(proc, tools_request)
-        if response and "result" in response:
-            tools = response["result"].get("tools", [])
+        tools_response = await send_jsonrpc_request(proc, tools_request)
+        if tools_response and "result" in tools_response:
+            tools = tools_response["result"].get("tools", [])
             print(f"Found {len(tools)} tools:")
             for i, tool in enumerate(tools, 1):
                 print(f"  {i}. {tool['name']}: {tool['description']}")
@@ -86,32 +110,11 @@ async def interactive_session():
                 if user_input.lower() in ["quit", "exit", "q"]:
                     break
 
-                if user_input.startswith("create "):
-                    message = user_input[7:]
-                    await create_conversation(proc, message)
-
-                elif user_input == "adapters":
-                    await list_adapters(proc)
-
-                elif user_input.startswith("list"):
-                    await list_conversations(proc)
-
-                elif user_input.startswith("recent "):
-                    parts = user_input.split()
-                    conv_id = parts[1]
-                    count = int(parts[2]) if len(parts) > 2 else 5
-                    await get_recent_messages(proc, conv_id, count)
-
-                elif user_input.startswith("call "):
-                    parts = user_input.split(maxsplit=3)
-                    if len(parts) >= 4:
-                        conv_id, adapter_name, message = parts[1], parts[2], parts[3]
-                        await call_llm(proc, conv_id, adapter_name, message)
-                    else:
-                        print(
-                            "❌ Usage: call <conversation_id> <adapter_name> <message>"
-                        )
-
+                # One partition instead of a startswith chain
+                command, _, args = user_input.partition(" ")
+                handler = COMMANDS.get(command.lower())
+                if handler:
+                    await handler(proc, args.strip())
                 else:
                     print(
                         "❌ Unknown command. Try: create, adapters, list, recent, call, quit"
@@ -124,7 +127,7 @@ async def interactive_session():
 
     finally:
         proc.terminate()
-        proc.wait(timeout=5)
+        await asyncio.wait_for(proc.wait(), timeout=5)
         print("\n👋 Session ended")
 
 
@@ -145,7 +148,7 @@ async def create_conversation(proc, message):
         result = response["result"]
         if "content" in result and result["content"]:
             content = result["content"][0]["text"]
-            data = json.loads(content)
+            data = loads(content)
             print(f"✅ {data['message']}")
             print(f"   Conversation ID: {data['conversation_id']}")
             return data["conversation_id"]
@@ -166,7 +169,7 @@ async def list_adapters(proc):
         result = response["result"]
         if "content" in result and result["content"]:
             content = result["content"][0]["text"]
-            data = json.loads(content)
+            data = loads(content)
             print(f"📊 Available adapters (default: {data.get('default_adapter')}):")
             for adapter in data.get("adapters", []):
                 status = "✅" if adapter.get("available") else "❌"
@@ -187,7 +190,7 @@ async def list_conversations(proc):
         result = response["result"]
         if "content" in result and result["content"]:
             content = result["content"][0]["text"]
-            data = json.loads(content)
+            data = loads(content)
             print(f"💬 Found {data['total']} conversations:")
             for conv in data.get("conversations", []):
                 print(
@@ -243,5 +246,56 @@ async def call_llm(proc, conv_id, adapter_name, message):
         print(f"❌ Error: {response['error']['message']}")
 
 
+async def handle_create(proc, args):
+    """create <message>"""
+    await create_conversation(proc, args)
+
+
+async def handle_adapters(proc, args):
+    """adapters"""
+    await list_adapters(proc)
+
+
+async def handle_list(proc, args):
+    """list"""
+    await list_conversations(proc)
+
+
+async def handle_recent(proc, args):
+    """recent <conv_id> [count]"""
+    parts = args.split()
+    if not parts:
+        print("❌ Usage: recent <conversation_id> [count]")
+        return
+    count = int(parts[1]) if len(parts) > 1 else 5
+    await get_recent_messages(proc, parts[0], count)
+
+
+async def handle_call(proc, args):
+    """call <conv_id> <adapter> <message>"""
+    parts = args.split(maxsplit=2)
+    if len(parts) < 3:
+        print("❌ Usage: call <conversation_id> <adapter_name> <message>")
+        return
+    conv_id, adapter_name, message = parts
+    await call_llm(proc, conv_id, adapter_name, message)
+
+
+# Command word -> handler(proc, args)
+COMMANDS = {
+    "create": handle_create,
+    "adapters": handle_adapters,
+    "list": handle_list,
+    "recent": handle_recent,
+    "call": handle_call,
+}
+
+
 if __name__ == "__main__":
-    asyncio.run(interactive_session())
+    # Prefer uvloop when installed; its libuv loop has cheaper subprocess pipe I/O
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(interactive_session())
+    else:
+        uvloop.run(interactive_session())
@@ -64,8 +64,13 @@ async def run_end_to_end_test():
 
     # Test adapter availability
     print("\n3. Testing adapter availability...")
-    for adapter in adapters_info["adapters"]:
-        is_available = await adapter_manager.test_adapter(adapter["name"])
+    availability = await asyncio.gather(
+        *(
+            adapter_manager.test_adapter(adapter["name"])
+            for adapter in adapters_info["adapters"]
+        )
+    )
+    for adapter, is_available in zip(adapters_info["adapters"], availability):
         status = "✅" if is_available else "❌"
         print(f"   {status} {adapter['name']}")
 
@@ -184,4 +189,10 @@ async def run_end_to_end_test():
 
 
 if __name__ == "__main__":
-    asyncio.run(run_end_to_end_test())
+    # Prefer uvloop when installed; its libuv loop has cheaper subprocess pipe I/O
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(run_end_to_end_test())
+    else:
+        uvloop.run(run_end_to_end_test())
@@ -0,0 +1,38 @@
+"""JSON encoding helpers - uses orjson when installed, stdlib json otherwise"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is not installed
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so one name covers both
+JSONDecodeError = json.JSONDecodeError
+
+
+if orjson is not None:
+
+    def dumps(obj: Any, indent: bool = False, newline: bool = False) -> bytes:
+        """Serialize obj to UTF-8 encoded JSON bytes, optionally ending in a newline"""
+        option = orjson.OPT_INDENT_2 if indent else 0
+        if newline:
+            option |= orjson.OPT_APPEND_NEWLINE
+        return orjson.dumps(obj, option=option)
+
+    loads = orjson.loads
+
+else:
+
+    def dumps(obj: Any, indent: bool = False, newline: bool = False) -> bytes:
+        """Serialize obj to UTF-8 encoded JSON bytes, optionally ending in a newline"""
+        if indent:
+            text = json.dumps(obj, ensure_ascii=False, indent=2)
+        else:
+            text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+        if newline:
+            text += "\n"
+        return text.encode("utf-8")
+
+    loads = json.loads
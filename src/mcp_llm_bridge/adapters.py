@@ -1,12 +1,48 @@
 """Adapter management - configurable LLM execution system"""
 
-import json
+import functools
+import importlib
+import inspect
 import os
 import asyncio
+import shutil
 import time
 from pathlib import Path
 from typing import Any
 
+from ._json import dumps, loads
+
+# Stdin payloads larger than this are streamed in chunks of this size
+STDIN_CHUNK_SIZE = 64 * 1024
+
+# Maximum size of one reply from a persistent adapter process
+STREAM_LIMIT = 16 * 1024 * 1024
+
+# asyncio.timeout() is only available on Python 3.11+
+_asyncio_timeout = getattr(asyncio, "timeout", None)
+
+
+async def _run_with_timeout(awaitable: Any, timeout: float) -> Any:
+    """Await with a timeout, using asyncio.timeout() where available"""
+    if _asyncio_timeout is None:  # Python 3.10
+        return await asyncio.wait_for(awaitable, timeout=timeout)
+
+    # Single timer handle, no extra wrapper task
+    async with _asyncio_timeout(timeout):
+        return await awaitable
+
+
+@functools.lru_cache(maxsize=8)
+def _load_config_cached(path: str, mtime_ns: int, size: int) -> dict[str, Any]:
+    """
+    Parse an adapter config file
+
+    Keyed on (path, mtime, size) so an edited file is re-read. The returned
+    dict is shared between callers and must not be mutated.
+    """
+    with open(path, "rb") as f:
+        return loads(f.read())
+
 
 class AdapterConfig:
     """Configuration for a single adapter"""
@@ -17,15 +53,61 @@ class AdapterConfig:
         self.description = config.get("description", "")
         self.config = config
 
+        # Execution settings, resolved once at load time
+        self.command: str | None = config.get("command")
+        self.args: tuple[str, ...] = tuple(config.get("args", []))
+        self.input_method: str = config.get("input_method", "stdin")
+        self.timeout: int = config.get("timeout_seconds", 300)
+        self.working_dir: str | None = config.get("working_dir")
+
+        # Subprocess environment: None inherits ours at no cost; adapters with
+        # custom env get the merged mapping built once per config load
+        env_overrides = config.get("env")
+        self.env: dict[str, str] | None = (
+            {**os.environ, **env_overrides} if env_overrides else None
+        )
+
+        # Positions of args containing the {message} placeholder
+        self.arg_template_indices: tuple[int, ...] = tuple(
+            i for i, arg in enumerate(self.args) if "{message}" in arg
+        )
+
+        # Opt-in pool of long-lived processes (stdin adapters only)
+        self.persistent: bool = (
+            bool(config.get("persistent", False)) and self.input_method == "stdin"
+        )
+        try:
+            self.pool_size: int = max(1, int(config.get("pool_size", 1)))
+        except (TypeError, ValueError):
+            # A bad value shouldn't stop the other adapters from loading
+            self.pool_size = 1
+        self.delimiter: bytes = config.get("delimiter", "\0").encode("utf-8")
+
+        # In-process function for python_callable adapters, resolved on first use
+        self._callable: Any = None
+
+    def get_callable(self) -> Any:
+        """Import and return the function of a python_callable adapter"""
+        if self._callable is None:
+            module = importlib.import_module(self.config["module"])
+            self._callable = getattr(module, self.config["function"])
+        return self._callable
+
 
 class AdapterManager:
     """Manages and executes LLM adapters"""
 
-    def __init__(self, config_path: Path):
+    def __init__(self, config_path: Path, availability_ttl: float = 60.0):
         self.config_path = Path(config_path).expanduser()
         self.adapters: dict[str, AdapterConfig] = {}
         self.default_adapter: str | None = None
         self.default_summarization_adapter: str | None = None
+        self.context_filter_adapter: str | None = None
+        # Seconds a test_adapter result stays valid
+        self.availability_ttl = availability_ttl
+        self._availability_cache: dict[str, tuple[bool, float]] = {}
+        # Idle processes of persistent adapters (None = not spawned yet)
+        self._pools: dict[str, asyncio.Queue] = {}
         self.load_adapters()
 
     def load_adapters(self) -> None:
@@ -33,16 +115,28 @@ class AdapterManager:
         if not self.config_path.exists():
             self._create_default_config()
 
-        with open(self.config_path, encoding="utf-8") as f:
-            config = json.load(f)
+        st = self.config_path.stat()
+        config = _load_config_cached(str(self.config_path), st.st_mtime_ns, st.st_size)
+
+        # Availability results and pooled processes refer to the previous
+        # config; kill idle processes without waiting, as this is sync
+        self._availability_cache.clear()
+        for pool in self._pools.values():
+            while not pool.empty():
+                process = pool.get_nowait()
+                if process is not None and process.returncode is None:
+                    process.kill()
+        self._pools.clear()
 
         # Load adapters
         for name, adapter_config in config.get("adapters", {}).items():
-            self.adapters[name] = AdapterConfig(name, adapter_config)
+            # Copy so per-adapter changes don't leak into the shared cache
+            self.adapters[name] = AdapterConfig(name, dict(adapter_config))
 
         # Load default adapters
         self.default_adapter = config.get("default_adapter")
         self.default_summarization_adapter = config.get("default_summarization_adapter")
+        self.context_filter_adapter = config.get("context_filter_adapter")
 
     def _create_default_config(self) -> None:
         """Create default adapter configuration file"""
@@ -62,8 +156,8 @@ class AdapterManager:
         }
 
         self.config_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.config_path, "w", encoding="utf-8") as f:
-            json.dump(default_config, f, indent=2)
+        with open(self.config_path, "wb") as f:
+            f.write(dumps(default_config, indent=True))
 
     async def call_adapter(
         self,
@@ -71,6 +165,7 @@ class AdapterManager:
         message: str,
         conversation_history: list[dict[str, Any]] | None = None,
         pass_history: bool = True,
+        history_text: str | None = None,
     ) -> dict[str, Any]:
         """
         Call an adapter with a message
@@ -80,6 +175,8 @@ class AdapterManager:
             message: Message to send
             conversation_history: Optional conversation history
             pass_history: Whether to pass history to adapter
+            history_text: Optional conversation_history already formatted by
+                format_history, so fan-out callers format it only once
 
         Returns:
             {
@@ -98,57 +195,107 @@ class AdapterManager:
 
         if adapter.type == "bash":
             return await self._call_bash_adapter(
+                adapter, message, conversation_history, pass_history, history_text
+            )
+        elif adapter.type == "python_callable":
+            return await self._call_python_adapter(
                 adapter, message, conversation_history, pass_history
             )
         else:
             raise ValueError(f"Unsupported adapter type: {adapter.type}")
 
+    async def _call_python_adapter(
+        self,
+        adapter: AdapterConfig,
+        message: str,
+        conversation_history: list[dict[str, Any]] | None,
+        pass_history: bool,
+    ) -> dict[str, Any]:
+        """
+        Call an in-process Python function adapter
+
+        The function is called as func(message, history) and must return the
+        response text. Coroutine functions are awaited; plain functions run in
+        a worker thread so they cannot block the event loop.
+        """
+        history = (conversation_history or []) if pass_history else []
+        timeout = adapter.timeout
+        start_time = time.time()
+
+        try:
+            func = adapter.get_callable()
+            if inspect.iscoroutinefunction(func):
+                call = func(message, history)
+            else:
+                call = asyncio.to_thread(func, message, history)
+            response = await _run_with_timeout(call, timeout)
+
+        except asyncio.TimeoutError:
+            return {
+                "response": "",
+                "metadata": {
+                    "adapter": adapter.name,
+                    "exit_code": -1,
+                    "execution_time_ms": timeout * 1000,
+                    "error": f"Function timed out after {timeout} seconds",
+                },
+            }
+
+        except Exception as e:
+            return {
+                "response": "",
+                "metadata": {
+                    "adapter": adapter.name,
+                    "exit_code": -1,
+                    "execution_time_ms": int((time.time() - start_time) * 1000),
+                    "error": f"{type(e).__name__}: {e}",
+                },
+            }
+
+        return {
+            "response": str(response).strip(),
+            "metadata": {
+                "adapter": adapter.name,
+                "exit_code": 0,
+                "execution_time_ms": int((time.time() - start_time) * 1000),
+                "error": None,
+            },
+        }
+
     async def _call_bash_adapter(
         self,
         adapter: AdapterConfig,
         message: str,
         conversation_history: list[dict[str, Any]] | None,
         pass_history: bool,
+        history_text: str | None = None,
     ) -> dict[str, Any]:
         """Execute bash command adapter"""
-        config = adapter.config
-        command = config["command"]
-        args = config.get("args", [])
-        input_method = config.get("input_method", "stdin")
-        env = {**os.environ, **config.get("env", {})}
-        timeout = config.get("timeout_seconds", 300)
-        working_dir = config.get("working_dir")
+        command = adapter.command
+        timeout = adapter.timeout
 
         # Build command
-        full_command = [command]
+        full_command = [command, *adapter.args]
 
         # Handle message placement
-        if input_method == "arg":
-            # Message goes in args
-            processed_args = []
-            message_added = False
-
-            for arg in args:
-                if "{message}" in arg:
-                    processed_args.append(arg.replace("{message}", message))
-                    message_added = True
-                else:
-                    processed_args.append(arg)
+        if adapter.input_method == "arg":
+            # Message goes in args: fill templates, offset by the command itself
+            for i in adapter.arg_template_indices:
+                full_command[i + 1] = full_command[i + 1].replace("{message}", message)
 
             # If no template found and message is not empty, append message at end
-            if not message_added and message:
-                processed_args.append(message)
+            if not adapter.arg_template_indices and message:
+                full_command.append(message)
 
-            full_command.extend(processed_args)
             stdin_input = None
         else:
             # Message goes to stdin
-            full_command.extend(args)
             stdin_input = message
 
         # Optionally prepend history
         if pass_history and conversation_history:
-            history_text = self._format_history(conversation_history)
+            if history_text is None:
+                history_text = self.format_history(conversation_history)
             if stdin_input:
                 # Both history and message: prepend history
                 stdin_input = f"{history_text} | {stdin_input}"
@@ -156,30 +303,39 @@ class AdapterManager:
                 # Only history, no message
                 stdin_input = history_text
 
+        # Encode the payload once; it is written straight from this buffer
+        stdin_bytes = stdin_input.encode("utf-8") if stdin_input else None
+
+        if adapter.persistent:
+            return await self._call_persistent_adapter(
+                adapter, full_command, stdin_bytes
+            )
+
         # Execute command
         start_time = time.time()
 
         try:
             process = await asyncio.create_subprocess_exec(
                 *full_command,
-                stdin=asyncio.subprocess.PIPE if stdin_input else None,
+                stdin=asyncio.subprocess.PIPE if stdin_bytes else None,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
-                env=env,
-                cwd=working_dir,
+                env=adapter.env,
+                cwd=adapter.working_dir,
             )
 
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(
-                    input=stdin_input.encode("utf-8") if stdin_input else None
-                ),
-                timeout=timeout,
+            stdout, stderr = await _run_with_timeout(
+                self._communicate(process, stdin_bytes), timeout
             )
 
             execution_time_ms = int((time.time() - start_time) * 1000)
 
-            response = stdout.decode("utf-8").strip()
-            error = stderr.decode("utf-8").strip() if stderr else None
+            response = stdout.decode("utf-8", "replace").strip()
+
+            # stderr is only reported on failure, so skip decoding it otherwise
+            error = None
+            if process.returncode != 0 and stderr:
+                error = stderr.decode("utf-8", "replace").strip()
 
             return {
                 "response": response,
@@ -187,11 +343,15 @@ class AdapterManager:
                     "adapter": adapter.name,
                     "exit_code": process.returncode,
                     "execution_time_ms": execution_time_ms,
-                    "error": error if process.returncode != 0 else None,
+                    "error": error,
                 },
             }
 
         except asyncio.TimeoutError:
+            # Don't leave the timed-out command running
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
             return {
                 "response": "",
                 "metadata": {
@@ -224,18 +384,187 @@ class AdapterManager:
                 },
             }
 
-    def _format_history(self, history: list[dict[str, Any]]) -> str:
+    async def _call_persistent_adapter(
+        self,
+        adapter: AdapterConfig,
+        full_command: list[str],
+        stdin_bytes: bytes | None,
+    ) -> dict[str, Any]:
+        """
+        Send one request to a pooled long-lived adapter process
+
+        The request is written to stdin followed by the adapter's delimiter
+        and the reply is read from stdout up to the same delimiter. Processes
+        are spawned on first use and respawned after a failure or timeout.
+        """
+        pool = self._pools.get(adapter.name)
+        if pool is None:
+            pool = asyncio.Queue()
+            for _ in range(adapter.pool_size):
+                pool.put_nowait(None)
+            self._pools[adapter.name] = pool
+
+        process = await pool.get()
+        start_time = time.time()
+        timeout = adapter.timeout
+
+        try:
+            if process is None or process.returncode is not None:
+                process = await asyncio.create_subprocess_exec(
+                    *full_command,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.DEVNULL,
+                    env=adapter.env,
+                    cwd=adapter.working_dir,
+                    limit=STREAM_LIMIT,
+                )
+
+            if stdin_bytes:
+                process.stdin.write(stdin_bytes)
+            process.stdin.write(adapter.delimiter)
+            reply = await _run_with_timeout(
+                self._read_reply(process, adapter.delimiter), timeout
+            )
+
+        except asyncio.CancelledError:
+            # A request may still be in flight; its late reply must not
+            # reach the next caller. Kill without awaiting while cancelled.
+            if process is not None and process.returncode is None:
+                process.kill()
+            process = None
+            raise
+
+        except asyncio.TimeoutError:
+            await self._discard_process(process)
+            process = None
+            return {
+                "response": "",
+                "metadata": {
+                    "adapter": adapter.name,
+                    "exit_code": -1,
+                    "execution_time_ms": timeout * 1000,
+                    "error": f"Command timed out after {timeout} seconds",
+                },
+            }
+
+        except FileNotFoundError:
+            process = None
+            return {
+                "response": "",
+                "metadata": {
+                    "adapter": adapter.name,
+                    "exit_code": -1,
+                    "execution_time_ms": 0,
+                    "error": f"Command not found: {adapter.command}",
+                },
+            }
+
+        except Exception as e:
+            await self._discard_process(process)
+            process = None
+            return {
+                "response": "",
+                "metadata": {
+                    "adapter": adapter.name,
+                    "exit_code": -1,
+                    "execution_time_ms": int((time.time() - start_time) * 1000),
+                    "error": str(e) or type(e).__name__,
+                },
+            }
+
+        finally:
+            if self._pools.get(adapter.name) is pool:
+                pool.put_nowait(process)
+            elif process is not None and process.returncode is None:
+                # The pool was retired by a config reload while in use
+                process.kill()
+
+        return {
+            "response": reply.decode("utf-8", "replace").strip(),
+            "metadata": {
+                "adapter": adapter.name,
+                "exit_code": 0,
+                "execution_time_ms": int((time.time() - start_time) * 1000),
+                "error": None,
+            },
+        }
+
+    async def _read_reply(
+        self, process: asyncio.subprocess.Process, delimiter: bytes
+    ) -> bytes:
+        """Flush the request and read one delimiter-terminated reply"""
+        await process.stdin.drain()
+        reply = await process.stdout.readuntil(delimiter)
+        return reply[: -len(delimiter)]
+
+    async def _discard_process(
+        self, process: asyncio.subprocess.Process | None
+    ) -> None:
+        """Kill a pooled process that can no longer be trusted"""
+        if process is not None and process.returncode is None:
+            process.kill()
+            await process.wait()
+
+    async def close(self) -> None:
+        """Terminate idle persistent adapter processes"""
+        for pool in self._pools.values():
+            while not pool.empty():
+                await self._discard_process(pool.get_nowait())
+        self._pools.clear()
+
+    async def _communicate(
+        self, process: asyncio.subprocess.Process, stdin_bytes: bytes | None
+    ) -> tuple[bytes, bytes]:
+        """
+        Send stdin_bytes to the process and collect its output
+
+        Small payloads go through communicate(). Large payloads are fed in
+        STDIN_CHUNK_SIZE slices of a memoryview while stdout/stderr are read
+        concurrently, so the pipe transport never buffers a second full copy.
+        """
+        if stdin_bytes is None or len(stdin_bytes) <= STDIN_CHUNK_SIZE:
+            return await process.communicate(input=stdin_bytes)
+
+        _, stdout, stderr = await asyncio.gather(
+            self._feed_stdin(process.stdin, stdin_bytes),
+            process.stdout.read(),
+            process.stderr.read(),
+        )
+        await process.wait()
+        return stdout, stderr
+
+    async def _feed_stdin(self, stream: asyncio.StreamWriter, data: bytes) -> None:
+        """Write data to a subprocess stdin in chunks, then close it"""
+        view = memoryview(data)
+        try:
+            for offset in range(0, len(view), STDIN_CHUNK_SIZE):
+                stream.write(view[offset : offset + STDIN_CHUNK_SIZE])
+                await stream.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # Process exited without reading all input, same as communicate()
+            pass
+        finally:
+            stream.close()
+
+    def format_history(self, history: list[dict[str, Any]]) -> str:
         """Format conversation history in compact format"""
         if not history:
             return ""
 
-        lines = []
-        for msg in history:
-            speaker = msg.get("speaker", "unknown")
-            content = msg.get("content", "").replace("\n", " ")
-            lines.append(f"{speaker}: {content}")
-
-        return " | ".join(lines)
+        # Build the list in one comprehension; join() would materialize a
+        # generator anyway. str.replace returns the original string when
+        # there is no newline, so it stays cheaper here than str.translate.
+        return " | ".join(
+            [
+                "%s: %s"
+                % (
+                    msg.get("speaker", "unknown"),
+                    msg.get("content", "").replace("\n", " "),
+                )
+                for msg in history
+            ]
+        )
 
     def list_adapters(self) -> dict[str, Any]:
         """List all configured adapters"""
@@ -245,37 +574,45 @@ class AdapterManager:
                     "name": name,
                     "type": adapter.type,
                     "description": adapter.description,
-                    "command": adapter.config.get("command", "N/A"),
+                    "command": adapter.command or "N/A",
                 }
                 for name, adapter in self.adapters.items()
             ],
             "default_adapter": self.default_adapter,
             "default_summarization_adapter": self.default_summarization_adapter,
+            "context_filter_adapter": self.context_filter_adapter,
             "config_path": str(self.config_path),
         }
 
     async def test_adapter(self, adapter_name: str) -> bool:
-        """Test if an adapter is available"""
+        """Test if an adapter is available (results are cached for availability_ttl)"""
         adapter = self.adapters.get(adapter_name)
         if not adapter:
             raise ValueError(f"Unknown adapter: {adapter_name}")
 
-        if adapter.type == "bash":
-            command = adapter.config["command"]
+        cached = self._availability_cache.get(adapter_name)
+        if cached and time.monotonic() - cached[1] < self.availability_ttl:
+            return cached[0]
 
-            # Check if command exists using 'which' or 'where'
-            check_command = "where" if os.name == "nt" else "which"
+        is_available = self._probe_adapter(adapter)
+        self._availability_cache[adapter_name] = (is_available, time.monotonic())
+        return is_available
 
+    def _probe_adapter(self, adapter: AdapterConfig) -> bool:
+        """Check whether the adapter's command can be found"""
+        if adapter.type == "bash":
+            if not adapter.command:
+                return False
+            # Resolve in-process against the PATH the adapter will run with
+            env = adapter.config.get("env") or {}
+            path = env.get("PATH") or os.environ.get("PATH")
+            return shutil.which(adapter.command, path=path) is not None
+
+        if adapter.type == "python_callable":
             try:
-                result = await asyncio.create_subprocess_exec(
-                    check_command,
-                    command,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-                await result.wait()
-                return result.returncode == 0
+                adapter.get_callable()
             except Exception:
                 return False
+            return True
 
         raise ValueError(f"Unsupported adapter type: {adapter.type}")
@@ -1,16 +1,56 @@
 """Context selection - decides which messages to include in history"""
 
+import re
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Iterable
 from typing import Any
 
+# Number of messages kept by "recent" mode
+RECENT_COUNT = 10
+
+# Trailing messages kept by "smart" mode next to the first message
+SMART_TAIL_COUNT = 5
+
+# Maximum number of per-message size estimates kept before the cache resets
+SIZE_CACHE_LIMIT = 10_000
+
+# Relevance decisions from the context filter LLM kept per (messages, query)
+FILTER_CACHE_SIZE = 128
+
+FILTER_PROMPT = (
+    "Which of these numbered conversation messages are needed to respond to "
+    "the new message? Reply with their numbers separated by commas, or 'none'."
+)
+
+_NUMBER = re.compile(r"\d+")
+
 
 class ContextSelector:
     """Selects conversation history based on context mode"""
 
+    def __init__(self, cache_size: int = 128):
+        # LRU of (cache_key, mode, max_tokens) -> selected messages
+        self.cache_size = cache_size
+        self._cache: OrderedDict[Hashable, list[dict[str, Any]]] = OrderedDict()
+        # id(message) -> (message, char count). Holding the message keeps its
+        # id from being reused while cached; messages are treated as immutable.
+        self._size_cache: dict[int, tuple[dict[str, Any], int]] = {}
+        # LRU of (cache_key, query) -> indices kept by filter_relevant
+        self._filter_cache: OrderedDict[Hashable, list[int]] = OrderedDict()
+        # Mode -> selection function ("none" is handled before dispatch)
+        self._selectors = {
+            "minimal": self._minimal_select,
+            "recent": self._recent_select,
+            "smart": self._smart_select,
+            "full": self._full_select,
+        }
+
     def select(
         self,
         messages: list[dict[str, Any]],
         mode: str,
         max_tokens: int | None = None,
+        cache_key: Hashable | None = None,
     ) -> list[dict[str, Any]]:
         """
         Select messages based on context mode
@@ -19,22 +59,42 @@ class ContextSelector:
             messages: Full conversation history
             mode: Context mode (full, recent, smart, minimal, none)
             max_tokens: Optional maximum token limit
+            cache_key: Optional key identifying this exact message list (e.g.
+                conversation id + version). When given, the selection is
+                memoized and the returned list must not be mutated.
 
         Returns:
             Selected messages
         """
+        if cache_key is None:
+            return self._select(messages, mode, max_tokens)
+
+        key = (cache_key, mode, max_tokens)
+        selected = self._cache.get(key)
+        if selected is not None:
+            self._cache.move_to_end(key)
+            return selected
+
+        selected = self._select(messages, mode, max_tokens)
+        self._cache[key] = selected
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return selected
+
+    def _select(
+        self,
+        messages: list[dict[str, Any]],
+        mode: str,
+        max_tokens: int | None,
+    ) -> list[dict[str, Any]]:
+        """Select messages without caching"""
         if mode == "none":
             return []
-        elif mode == "minimal":
-            selected = messages[-1:] if messages else []
-        elif mode == "recent":
-            selected = messages[-10:] if len(messages) > 10 else messages
-        elif mode == "smart":
-            selected = self._smart_select(messages)
-        elif mode == "full":
-            selected = messages
-        else:
+
+        selector = self._selectors.get(mode)
+        if selector is None:
             raise ValueError(f"Unknown context mode: {mode}")
+        selected = selector(messages)
 
         # Apply token limit if specified
         if max_tokens is not None:
@@ -42,6 +102,66 @@ class ContextSelector:
 
         return selected
 
+    async def filter_relevant(
+        self,
+        messages: list[dict[str, Any]],
+        query: str,
+        ask: Callable[[str], Awaitable[str]],
+        cache_key: Hashable | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Keep only the messages a cheap filter LLM judges relevant to query
+
+        Args:
+            messages: Candidate messages, e.g. the result of select()
+            query: The new message the history is being sent with
+            ask: Sends a prompt to the filter LLM and returns its reply
+            cache_key: Optional key identifying this exact message list; the
+                decision is memoized per (cache_key, query)
+
+        Returns:
+            Relevant messages in their original order, or all messages if the
+            filter fails or its reply has no usable answer
+        """
+        if len(messages) <= 1 or not query:
+            return messages
+
+        key = (cache_key, query)
+        indices = self._filter_cache.get(key) if cache_key is not None else None
+        if indices is not None:
+            self._filter_cache.move_to_end(key)
+            return [messages[i] for i in indices]
+
+        numbered = "\n".join(
+            [
+                "[%d] %s: %s"
+                % (
+                    number,
+                    msg.get("speaker", "unknown"),
+                    msg.get("content", "").replace("\n", " "),
+                )
+                for number, msg in enumerate(messages, 1)
+            ]
+        )
+        prompt = f"{FILTER_PROMPT}\n\n{numbered}\n\nNew message: {query}"
+
+        try:
+            reply = await ask(prompt)
+        except Exception:
+            return messages
+
+        # 1-based numbers in the reply; an explicit "none" keeps nothing
+        picked = {int(n) - 1 for n in _NUMBER.findall(reply)}
+        indices = [i for i in range(len(messages)) if i in picked]
+        if not indices and "none" not in reply.lower():
+            return messages
+
+        if cache_key is not None:
+            self._filter_cache[key] = indices
+            if len(self._filter_cache) > FILTER_CACHE_SIZE:
+                self._filter_cache.popitem(last=False)
+        return [messages[i] for i in indices]
+
     def _smart_select(self, messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
         """
         Smart selection algorithm:
@@ -52,12 +172,26 @@ class ContextSelector:
         if len(messages) < 10:
             return messages
 
-        # First message + last 5
-        selected = [messages[0]]
-        selected.extend(messages[-5:])
-
+        # First message + last 5: one slice copy, then pin the first message
+        # in the slot of the oldest tail entry
+        selected = messages[-(SMART_TAIL_COUNT + 1) :]
+        selected[0] = messages[0]
         return selected
 
+    def _minimal_select(self, messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Last message only"""
+        return messages[-1:]
+
+    def _recent_select(self, messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Last RECENT_COUNT messages, without copying shorter conversations"""
+        if len(messages) > RECENT_COUNT:
+            return messages[-RECENT_COUNT:]
+        return messages
+
+    def _full_select(self, messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """All messages"""
+        return messages
+
     def estimate_tokens(self, messages: list[dict[str, Any]]) -> int:
         """
         Estimate token count for messages (approximately 4 chars per token)
@@ -68,18 +202,13 @@ class ContextSelector:
         Returns:
             Estimated token count
         """
-        if not messages:
-            return 0
-
-        total_chars = 0
-        for msg in messages:
-            content = msg.get("content", "")
-            speaker = msg.get("speaker", "")
-            # Count content + speaker name + formatting overhead
-            total_chars += len(content) + len(speaker) + 4  # ": " and newlines
-
         # Rough estimation: 4 characters per token
-        return total_chars // 4
+        return self._tokens(map(self.estimate_one, messages))
+
+    @staticmethod
+    def _tokens(sizes: Iterable[int]) -> int:
+        """Token estimate for precomputed character counts"""
+        return sum(sizes) // 4
 
     def _apply_token_limit(
         self,
@@ -101,33 +230,66 @@ class ContextSelector:
         if not messages:
             return messages
 
+        # Size every message once; each trim below is then a single linear scan
+        sizes = list(map(self.estimate_one, messages))
+
         # Check if already within limit
-        if self.estimate_tokens(messages) <= max_tokens:
+        if self._tokens(sizes) <= max_tokens:
             return messages
 
         # Trim from appropriate end based on mode
         if mode == "smart" and len(messages) > 1:
-            # For smart mode, keep first message and trim from middle
-            first_msg = messages[0]
-            remaining = messages[1:]
-
-            # Try to keep as many recent messages as possible
-            for i in range(len(remaining), 0, -1):
-                candidate = [first_msg] + remaining[-i:]
-                if self.estimate_tokens(candidate) <= max_tokens:
-                    return candidate
-
-            # If even first + last doesn't fit, just return last messages
-            for i in range(len(messages), 0, -1):
-                candidate = messages[-i:]
-                if self.estimate_tokens(candidate) <= max_tokens:
-                    return candidate
-        else:
-            # For other modes, trim from the front (keep most recent)
-            for i in range(len(messages), 0, -1):
-                candidate = messages[-i:]
-                if self.estimate_tokens(candidate) <= max_tokens:
-                    return candidate
+            # For smart mode, keep first message and as many recent ones as fit
+            count = self._tail_fit(sizes[1:], sizes[0], max_tokens)
+            if count:
+                return [messages[0]] + messages[-count:]
+
+        # Otherwise (or if even first + last doesn't fit) keep the most recent
+        count = self._tail_fit(sizes, 0, max_tokens)
 
         # If even one message is too large, return empty list
-        return []
+        return messages[-count:] if count else []
+
+    def estimate_one(self, msg: dict[str, Any]) -> int:
+        """
+        Character count of one message: content + speaker + formatting overhead
+
+        Results are memoized per message object, so repeated estimates over
+        the same message list only measure each message once.
+        """
+        cached = self._size_cache.get(id(msg))
+        if cached is not None and cached[0] is msg:
+            return cached[1]
+
+        size = len(msg.get("content", "")) + len(msg.get("speaker", "")) + 4
+        if len(self._size_cache) >= SIZE_CACHE_LIMIT:
+            self._size_cache.clear()
+        self._size_cache[id(msg)] = (msg, size)
+        return size
+
+    def clear_cache(self) -> None:
+        """Drop memoized selections, filter decisions and message size estimates"""
+        self._cache.clear()
+        self._size_cache.clear()
+        self._filter_cache.clear()
+
+    def _tail_fit(self, sizes: list[int], base: int, max_tokens: int) -> int:
+        """
+        Count how many trailing messages fit within max_tokens
+
+        Args:
+            sizes: Character counts of the candidate messages
+            base: Characters already committed (e.g. a pinned first message)
+            max_tokens: Maximum token limit
+
+        Returns:
+            Largest k such that base + sum(sizes[-k:]) fits
+        """
+        total = base
+        count = 0
+        for size in reversed(sizes):
+            total += size
+            if total // 4 > max_tokens:
+                break
+            count += 1
+        return count
@@ -1,21 +1,151 @@
 """Conversation management - handles JSONL file I/O for conversation history"""
 
-import json
+import atexit
+import functools
+import heapq
 import os
 import random
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import Any
+from operator import methodcaller
+from typing import Any, BinaryIO
+
+from ._json import JSONDecodeError, dumps, loads
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - exercised when ijson is not installed
+    ijson = None
+
+# Errors meaning a legacy JSON file could not be parsed
+_LEGACY_DECODE_ERRORS: tuple[type[Exception], ...] = (
+    JSONDecodeError,
+    UnicodeDecodeError,
+)
+if ijson is not None:
+    _LEGACY_DECODE_ERRORS += (ijson.JSONError,)
+
+
+def _iter_legacy_messages(f: BinaryIO) -> Iterable[Any]:
+    """Messages of a legacy JSON array, streamed one by one if ijson is installed"""
+    if ijson is not None:
+        return ijson.items(f, "item", use_float=True)
+    return loads(f.read())
+
+
+# Bytes read per step when scanning a conversation file backwards
+TAIL_CHUNK_SIZE = 64 * 1024
+
+# Characters kept in a conversation ID (\w is exactly str.isalnum() plus "_")
+_UNSAFE_ID_CHARS = re.compile(r"[^\w.-]")
+
+# IDs with path separators, parent references or null bytes are rejected
+_REJECTED_ID = re.compile(r"[/\\\x00]|\.\.")
+
+# Distinct conversation IDs whose sanitized form and paths are remembered
+SANITIZE_CACHE_SIZE = 1024
+
+# Conversations whose fully parsed message list is kept in memory
+MESSAGE_CACHE_SIZE = 64
+
+# Listings parsing more metadata files than this read them from a thread pool
+PARALLEL_METADATA_MIN = 8
+METADATA_LOAD_WORKERS = 32
+
+# File in the metadata directory persisting parsed metadata between runs;
+# it has no .json suffix so it can't collide with a conversation's metadata
+LISTING_INDEX_NAME = ".index"
+
+# How appends are made durable: fsync every write, fsync in batches, or never
+FSYNC_MODES = ("always", "batch", "none")
+
+# Managers that may hold unsynced or unwritten data, flushed at interpreter exit
+_batching_managers: "weakref.WeakSet[ConversationManager]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_batching_managers() -> None:
+    for manager in list(_batching_managers):
+        manager.flush()
 
 
 class ConversationManager:
     """Manages conversation files and metadata"""
 
-    def __init__(self, conversation_dir: Path):
+    def __init__(
+        self,
+        conversation_dir: Path,
+        fsync_mode: str = "batch",
+        fsync_interval: float = 0.1,
+        metadata_flush_interval: float | None = None,
+    ):
+        """
+        Args:
+            conversation_dir: Directory holding conversation files
+            fsync_mode: "always" fsyncs every write, "batch" fsyncs written
+                        files at most once per fsync_interval seconds from a
+                        background timer, "none" leaves it to the OS
+            fsync_interval: Seconds between batched fsyncs
+            metadata_flush_interval: If set, metadata changed by appends is
+                        kept in memory and written at most once per this many
+                        seconds instead of on every append
+        """
+        if fsync_mode not in FSYNC_MODES:
+            raise ValueError(
+                f"Unknown fsync_mode: {fsync_mode} (expected one of {FSYNC_MODES})"
+            )
+        self.fsync_mode = fsync_mode
+        self.fsync_interval = fsync_interval
+        # Files written since the last batched fsync
+        self._dirty: set[Path] = set()
+        self._dirty_lock = threading.Lock()
+        self._flush_timer: threading.Timer | None = None
+        self.metadata_flush_interval = metadata_flush_interval
+        # conversation id -> metadata newer than its file (deferred writes)
+        self._pending_metadata: dict[str, dict[str, Any]] = {}
+        self._metadata_timer: threading.Timer | None = None
+        # Serializes metadata file writes with the pending-entry checks that
+        # decide whether a deferred write is still current
+        self._metadata_write_lock = threading.Lock()
+        if fsync_mode == "batch" or metadata_flush_interval is not None:
+            _batching_managers.add(self)
+
         self.conversation_dir = Path(conversation_dir).expanduser()
         self.conversation_dir.mkdir(parents=True, exist_ok=True)
         self.metadata_dir = self.conversation_dir / ".metadata"
         self.metadata_dir.mkdir(exist_ok=True)
+        self.summary_dir = self.conversation_dir / ".summaries"
+        self._conversation_dir_resolved = str(self.conversation_dir.resolve())
+        # The same IDs are sanitized and joined into paths several times per request
+        self._sanitize_id = functools.lru_cache(maxsize=SANITIZE_CACHE_SIZE)(
+            self._sanitize_id
+        )
+        self._paths = functools.lru_cache(maxsize=SANITIZE_CACHE_SIZE)(self._paths)
+        # Per-conversation counter bumped on every append made by this manager
+        self._versions: dict[str, int] = {}
+        # conversation id -> (file size, message count) at that size
+        self._message_counts: dict[str, tuple[int, int]] = {}
+        # conversation id -> ((mtime_ns, size) of metadata file, parsed metadata)
+        self._meta_cache: dict[str, tuple[tuple[int, int], dict[str, Any]]] = {}
+        # The metadata cache is seeded from and saved to the listing index
+        self._index_path = self.metadata_dir / LISTING_INDEX_NAME
+        self._index_loaded = False
+        # Ids with an entry in the index file, and whether any metadata file
+        # had to be parsed since it was last written
+        self._indexed_ids: set[str] = set()
+        self._index_dirty = False
+        # LRU of conversation id -> ((mtime_ns, size) of JSONL file, messages)
+        self._message_cache: OrderedDict[
+            str, tuple[tuple[int, int], list[dict[str, Any]]]
+        ] = OrderedDict()
+        # Conversation IDs already known to be stored as JSONL
+        self._migrated: set[str] = set()
 
     def _sanitize_id(self, conversation_id: str) -> str:
         """
@@ -23,16 +153,11 @@ class ConversationManager:
         Returns empty string if ID contains path separators or becomes empty after sanitization
         """
         # Reject IDs with path separators or null bytes
-        if (
-            "/" in conversation_id
-            or "\\" in conversation_id
-            or ".." in conversation_id
-            or "\x00" in conversation_id
-        ):
+        if _REJECTED_ID.search(conversation_id):
             return ""
 
         # Filter to alphanumeric and safe characters (including dots)
-        safe_id = "".join(c for c in conversation_id if c.isalnum() or c in "-_.")
+        safe_id = _UNSAFE_ID_CHARS.sub("", conversation_id)
 
         # Return empty if sanitization removed everything
         if not safe_id:
@@ -41,36 +166,49 @@ class ConversationManager:
         # Verify resolved path stays within conversation_dir
         try:
             conv_path = (self.conversation_dir / f"{safe_id}.jsonl").resolve()
-            conv_dir_resolved = self.conversation_dir.resolve()
 
             # Check if the resolved path is within conversation_dir
-            if not str(conv_path).startswith(str(conv_dir_resolved)):
+            if not str(conv_path).startswith(self._conversation_dir_resolved):
                 return ""
         except (ValueError, OSError):
             return ""
 
         return safe_id
 
+    def _paths(self, conversation_id: str) -> tuple[str, Path, Path]:
+        """Get (sanitized ID, JSONL path, metadata path) for a conversation"""
+        safe_id = self._sanitize_id(conversation_id)
+        return (
+            safe_id,
+            self.conversation_dir / f"{safe_id}.jsonl",
+            self.metadata_dir / f"{safe_id}.json",
+        )
+
     def _get_conversation_path(self, conversation_id: str) -> Path:
         """Get path to conversation JSONL file"""
-        safe_id = self._sanitize_id(conversation_id)
-        return self.conversation_dir / f"{safe_id}.jsonl"
+        return self._paths(conversation_id)[1]
 
     def _get_metadata_path(self, conversation_id: str) -> Path:
         """Get path to conversation metadata file"""
-        safe_id = self._sanitize_id(conversation_id)
-        return self.metadata_dir / f"{safe_id}.json"
+        return self._paths(conversation_id)[2]
+
+    def _get_legacy_path(self, conversation_id: str) -> Path:
+        """Get path to a conversation's pre-JSONL .json file"""
+        return self.conversation_dir / f"{self._sanitize_id(conversation_id)}.json"
 
     def conversation_exists(self, conversation_id: str) -> bool:
         """Check if conversation exists (JSONL or legacy JSON)"""
-        jsonl_path = self._get_conversation_path(conversation_id)
-        if jsonl_path.exists():
+        safe_id, jsonl_path, _ = self._paths(conversation_id)
+
+        # Always one stat: other processes may create or delete conversations
+        # at any time, so a remembered answer can't be trusted on its own
+        if jsonl_path.is_file():
+            self._migrated.add(safe_id)
             return True
+        self._migrated.discard(safe_id)
 
         # Check for legacy .json file
-        safe_id = self._sanitize_id(conversation_id)
-        legacy_path = self.conversation_dir / f"{safe_id}.json"
-        return legacy_path.exists()
+        return self._get_legacy_path(conversation_id).exists()
 
     def create_conversation(
         self,
@@ -112,6 +250,7 @@ class ConversationManager:
         # Initialize empty JSONL conversation file
         conv_path = self._get_conversation_path(sanitized_id)
         conv_path.touch()  # Create empty file
+        self._migrated.add(sanitized_id)
 
         # Add initial message if provided
         if initial_message:
@@ -126,10 +265,11 @@ class ConversationManager:
 
         # Create metadata
         speaker = f"host_{host_name}" if host_name else "host"
+        now = datetime.now().isoformat()
         meta = {
             "id": sanitized_id,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
+            "created_at": now,
+            "updated_at": now,
             "participants": [speaker] if initial_message else [],
             "message_count": 1 if initial_message else 0,
             "topic": metadata.get("topic", "") if metadata else "",
@@ -157,32 +297,121 @@ class ConversationManager:
             content: Message content
             metadata: Optional metadata (tokens, cost, etc.)
         """
+        self.append_messages(
+            conversation_id,
+            [{"speaker": speaker, "content": content, "metadata": metadata}],
+        )
+
+    def append_messages(
+        self, conversation_id: str, entries: list[dict[str, Any]]
+    ) -> None:
+        """
+        Append several messages with a single write
+
+        Args:
+            conversation_id: Conversation identifier
+            entries: Dicts with "speaker", "content" and optional "metadata",
+                     in the order they should be appended
+        """
+        if not entries:
+            return
+
         # Migrate legacy JSON if needed
         self._migrate_if_needed(conversation_id)
 
-        conv_path = self._get_conversation_path(conversation_id)
+        safe_id, conv_path, _ = self._paths(conversation_id)
 
-        # Count existing messages to determine turn number
-        message_count = self._count_messages(conversation_id)
+        # Count existing messages to determine turn numbers
+        message_count = self._get_message_count(safe_id, conv_path)
 
-        # Create message entry
-        message = {
-            "turn": message_count + 1,
-            "speaker": speaker,
-            "content": content,
-            "timestamp": datetime.now().isoformat(),
-            "metadata": metadata or {},
-        }
+        # One clock read serves the messages and their metadata update
+        timestamp = datetime.now().isoformat()
 
-        # Append as single JSONL line
-        with open(conv_path, "a", encoding="utf-8") as f:
-            json.dump(message, f, ensure_ascii=False)
-            f.write("\n")
-            f.flush()
-            os.fsync(f.fileno())  # Ensure durability
+        # Create message entries
+        messages = [
+            {
+                "turn": message_count + turn,
+                "speaker": entry["speaker"],
+                "content": entry["content"],
+                "timestamp": timestamp,
+                # Copied: the message may be served from the read cache later
+                "metadata": dict(entry["metadata"]) if entry.get("metadata") else {},
+            }
+            for turn, entry in enumerate(entries, 1)
+        ]
+
+        # Append as JSONL lines: one encode per message, one write for all
+        payload = b"".join([dumps(message, newline=True) for message in messages])
+        with open(conv_path, "ab") as f:
+            before = os.fstat(f.fileno())
+            f.write(payload)
+            self._sync(f, conv_path)
+            after = os.fstat(f.fileno())
+        size = after.st_size
+
+        # A cached read that was current before this write only needs the
+        # new messages; anything else changed the file under us
+        cached = self._message_cache.get(safe_id)
+        if cached:
+            if cached[0] == (before.st_mtime_ns, before.st_size):
+                cached[1].extend(messages)
+                self._message_cache[safe_id] = ((after.st_mtime_ns, size), cached[1])
+            else:
+                del self._message_cache[safe_id]
+
+        message_count += len(messages)
+        self._message_counts[safe_id] = (size, message_count)
+        self._versions[safe_id] = self._versions.get(safe_id, 0) + 1
 
         # Update metadata
-        self._update_metadata_on_append(conversation_id, speaker)
+        self._update_metadata_on_append(
+            conversation_id,
+            [message["speaker"] for message in messages],
+            timestamp,
+            message_count,
+        )
+
+    def _sync(self, f, path: Path) -> None:
+        """Flush a just-written file and make it durable per fsync_mode"""
+        f.flush()
+        if self.fsync_mode == "always":
+            os.fsync(f.fileno())
+        elif self.fsync_mode == "batch":
+            with self._dirty_lock:
+                self._dirty.add(path)
+                if self._flush_timer is None:
+                    self._flush_timer = threading.Timer(self.fsync_interval, self.flush)
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+
+    def flush(self) -> None:
+        """Write deferred metadata and fsync files written since the last flush"""
+        self.flush_metadata()
+
+        with self._dirty_lock:
+            paths, self._dirty = self._dirty, set()
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+
+        # fsync applies to the file, so a fresh descriptor is enough
+        for path in paths:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def get_version(self, conversation_id: str) -> int:
+        """
+        Get a counter that changes whenever this manager appends to the conversation
+
+        Useful as part of a cache key for data derived from the message list.
+        """
+        return self._versions.get(self._sanitize_id(conversation_id), 0)
 
     def read_messages(
         self,
@@ -199,49 +428,190 @@ class ConversationManager:
             end: Ending message index (exclusive)
 
         Returns:
-            List of message dicts
+            List of message dicts. Full reads are cached until the file
+            changes, so the dicts may be shared and must not be mutated.
         """
         # Migrate legacy JSON if needed
         self._migrate_if_needed(conversation_id)
 
-        conv_path = self._get_conversation_path(conversation_id)
+        safe_id, conv_path, _ = self._paths(conversation_id)
 
-        if not conv_path.exists():
+        try:
+            st = conv_path.stat()
+        except FileNotFoundError:
             return []
 
+        file_key = (st.st_mtime_ns, st.st_size)
+        cached = self._message_cache.get(safe_id)
+        if cached and cached[0] == file_key:
+            self._message_cache.move_to_end(safe_id)
+            return cached[1][start:end]
+
+        # Only the last -start messages are needed: parse just the file tail
+        if start is not None and start < 0 and (end is None or end < 0):
+            return self._read_tail(conv_path, conversation_id, -start)[start:end]
+
+        # A non-negative end means nothing past that message is needed
+        stop = None
+        if end is not None and end >= 0 and (start is None or start >= 0):
+            stop = end
+
         messages = []
-        with open(conv_path, encoding="utf-8") as f:
+        with open(conv_path, "rb") as f:
             for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if not line:  # Skip empty lines
+                if stop is not None and len(messages) >= stop:
+                    break
+
+                # Skip empty lines; loads tolerates the trailing newline
+                if line.isspace():
                     continue
 
                 try:
-                    message = json.loads(line)
+                    message = loads(line)
                     messages.append(message)
-                except json.JSONDecodeError as e:
+                except (JSONDecodeError, UnicodeDecodeError) as e:
                     # Handle corrupted lines gracefully - log and skip
                     print(
                         f"Warning: Skipping corrupted line {line_num} in {conversation_id}: {e}"
                     )
                     continue
 
-        # Apply slicing
-        if start is not None or end is not None:
-            return messages[start:end]
+        # Only a complete parse is worth keeping
+        if stop is None:
+            self._message_cache[safe_id] = (file_key, messages)
+            if len(self._message_cache) > MESSAGE_CACHE_SIZE:
+                self._message_cache.popitem(last=False)
+
+        # Apply slicing; always a new list, the cached one stays private
+        return messages[start:end]
+
+    def _read_tail(
+        self, conv_path: Path, conversation_id: str, count: int
+    ) -> list[dict[str, Any]]:
+        """
+        Parse the last `count` messages by reading the file backwards
 
+        Reads TAIL_CHUNK_SIZE blocks from the end until enough valid lines have
+        been decoded, so cost scales with the tail size, not the file size.
+        """
+        messages: list[dict[str, Any]] = []
+        with open(conv_path, "rb") as f:
+            pos = f.seek(0, os.SEEK_END)
+            partial = b""
+
+            while pos > 0 and len(messages) < count:
+                read_size = min(TAIL_CHUNK_SIZE, pos)
+                pos -= read_size
+                f.seek(pos)
+                lines = (f.read(read_size) + partial).split(b"\n")
+
+                # The first piece may continue in the previous block
+                partial = lines.pop(0) if pos > 0 else b""
+
+                for line in reversed(lines):
+                    if not line or line.isspace():  # Skip empty lines
+                        continue
+                    try:
+                        messages.append(loads(line))
+                    except (JSONDecodeError, UnicodeDecodeError) as e:
+                        # Handle corrupted lines gracefully - log and skip
+                        print(
+                            f"Warning: Skipping corrupted line in {conversation_id}: {e}"
+                        )
+                        continue
+                    if len(messages) >= count:
+                        break
+
+        messages.reverse()
         return messages
 
     def get_metadata(self, conversation_id: str) -> dict[str, Any]:
-        """Get conversation metadata"""
-        meta_path = self._get_metadata_path(conversation_id)
+        """
+        Get conversation metadata
+
+        Parsed metadata is cached until the file's mtime or size changes;
+        the returned dict is shared with the cache and must not be mutated.
+        """
+        metadata, cold = self._lookup_metadata(conversation_id)
+        if metadata is not None:
+            return metadata
+
+        safe_id, meta_path, file_key = cold
+        metadata = self._read_metadata_file(meta_path)
+        self._meta_cache[safe_id] = (file_key, metadata)
+        self._index_dirty = True
+        return metadata
+
+    def _lookup_metadata(
+        self, conversation_id: str
+    ) -> tuple[dict[str, Any] | None, tuple[str, Path, tuple[int, int]] | None]:
+        """
+        Get metadata that doesn't need its file parsed
+
+        Returns (metadata, None) for deferred, cached or generated metadata,
+        else (None, (safe_id, metadata path, (mtime_ns, size))) for a file
+        that must be read and parsed before caching under that key.
+        """
+        safe_id, _, meta_path = self._paths(conversation_id)
+
+        # Deferred metadata is newer than anything on disk
+        pending = self._pending_metadata.get(safe_id)
+        if pending is not None:
+            return pending, None
 
-        if not meta_path.exists():
+        try:
+            st = meta_path.stat()
+        except FileNotFoundError:
             # Generate from conversation file
-            return self._generate_metadata(conversation_id)
+            return self._generate_metadata(conversation_id), None
+
+        file_key = (st.st_mtime_ns, st.st_size)
+        cached = self._meta_cache.get(safe_id)
+        if cached and cached[0] == file_key:
+            return cached[1], None
 
-        with open(meta_path, encoding="utf-8") as f:
-            return json.load(f)
+        return None, (safe_id, meta_path, file_key)
+
+    @staticmethod
+    def _read_metadata_file(meta_path: Path) -> dict[str, Any]:
+        """Read and parse a metadata file; touches no manager state"""
+        with open(meta_path, "rb") as f:
+            return loads(f.read())
+
+    def get_cached_summary(self, conversation_id: str) -> dict[str, Any] | None:
+        """
+        Get the last stored summary of a conversation
+
+        Returns:
+            {"summary", "message_count", "last_timestamp", "adapter"} or None
+            if no readable summary has been stored
+        """
+        summary_path = self.summary_dir / f"{self._sanitize_id(conversation_id)}.json"
+        try:
+            with open(summary_path, "rb") as f:
+                return loads(f.read())
+        except (FileNotFoundError, JSONDecodeError, UnicodeDecodeError):
+            return None
+
+    def save_summary(
+        self,
+        conversation_id: str,
+        summary: str,
+        messages: list[dict[str, Any]],
+        adapter: str,
+    ) -> None:
+        """Store a summary covering messages, the conversation's first len(messages)"""
+        self.summary_dir.mkdir(exist_ok=True)
+        summary_path = self.summary_dir / f"{self._sanitize_id(conversation_id)}.json"
+        record = {
+            "summary": summary,
+            "message_count": len(messages),
+            "last_timestamp": messages[-1].get("timestamp") if messages else None,
+            "adapter": adapter,
+        }
+        with open(summary_path, "wb") as f:
+            f.write(dumps(record, indent=True))
+            self._sync(f, summary_path)
 
     def list_conversations(
         self, limit: int = 20, sort_by: str = "updated_at", order: str = "desc"
@@ -257,57 +627,241 @@ class ConversationManager:
         Returns:
             List of conversation metadata dicts
         """
-        conversations = []
-        seen_ids = set()
-
-        # First, get all JSONL files
-        for conv_file in self.conversation_dir.glob("*.jsonl"):
-            conv_id = conv_file.stem
-            seen_ids.add(conv_id)
-            metadata = self.get_metadata(conv_id)
+        self._load_listing_index()
+
+        # One directory pass: JSONL files first, then legacy JSON files
+        # that haven't been migrated yet
+        jsonl_ids = []
+        legacy_ids = []
+        with os.scandir(self.conversation_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".jsonl"):
+                    jsonl_ids.append(entry.name[: -len(".jsonl")])
+                elif entry.name.endswith(".json"):
+                    legacy_ids.append(entry.name[: -len(".json")])
+
+        seen_ids = set(jsonl_ids)
+        conv_ids = jsonl_ids + [cid for cid in legacy_ids if cid not in seen_ids]
+
+        # Cache hits, deferred and generated metadata are resolved here;
+        # only files that need parsing are collected
+        conversations: list[dict[str, Any]] = []
+        cold = []
+        for conv_id in conv_ids:
+            metadata, cold_entry = self._lookup_metadata(conv_id)
+            if cold_entry is not None:
+                cold.append((len(conversations), cold_entry))
             conversations.append(metadata)
 
-        # Also check for legacy JSON files that haven't been migrated yet
-        for conv_file in self.conversation_dir.glob("*.json"):
-            conv_id = conv_file.stem
-            if conv_id not in seen_ids:
-                # This is a legacy file that needs migration
-                metadata = self.get_metadata(conv_id)
-                conversations.append(metadata)
-                seen_ids.add(conv_id)
-
-        # Sort
-        reverse = order == "desc"
-        conversations.sort(key=lambda x: x.get(sort_by, ""), reverse=reverse)
+        meta_paths = [meta_path for _, (_, meta_path, _) in cold]
+        if len(cold) > PARALLEL_METADATA_MIN:
+            # File reads release the GIL, so cold loads overlap; workers
+            # only parse, all cache updates happen on this thread
+            workers = min(METADATA_LOAD_WORKERS, len(cold))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                parsed = list(executor.map(self._read_metadata_file, meta_paths))
+        else:
+            parsed = [self._read_metadata_file(path) for path in meta_paths]
+
+        for (position, (safe_id, _, file_key)), metadata in zip(cold, parsed):
+            self._meta_cache[safe_id] = (file_key, metadata)
+            conversations[position] = metadata
+        if cold:
+            self._index_dirty = True
+        self._save_listing_index(conv_ids)
+
+        # Select the top `limit` without sorting the rest; same order and
+        # tie-breaking as sorted(...)[:limit]
+        key = methodcaller("get", sort_by, "")
+        if limit < 0:
+            return sorted(conversations, key=key, reverse=order == "desc")[:limit]
+        if order == "desc":
+            return heapq.nlargest(limit, conversations, key=key)
+        return heapq.nsmallest(limit, conversations, key=key)
+
+    def _load_listing_index(self) -> None:
+        """
+        Seed the metadata cache from the listing index written by an earlier run
 
-        return conversations[:limit]
+        Entries keep the (mtime_ns, size) of the metadata file they were
+        parsed from, so get_metadata still rereads any file changed since.
+        """
+        if self._index_loaded:
+            return
+        self._index_loaded = True
+        try:
+            with open(self._index_path, "rb") as f:
+                index = loads(f.read())
+        except (FileNotFoundError, JSONDecodeError, UnicodeDecodeError):
+            return
 
-    def _count_messages(self, conversation_id: str) -> int:
-        """Count messages in conversation"""
-        return len(self.read_messages(conversation_id))
+        # A truncated, hand-edited or foreign index is as good as none;
+        # malformed entries are skipped
+        if not isinstance(index, dict):
+            return
+        for safe_id, entry in index.items():
+            try:
+                mtime_ns, size, metadata = entry
+            except (TypeError, ValueError):
+                continue
+            if not (
+                isinstance(mtime_ns, int)
+                and isinstance(size, int)
+                and isinstance(metadata, dict)
+            ):
+                continue
+            self._meta_cache.setdefault(safe_id, ((mtime_ns, size), metadata))
+            self._indexed_ids.add(safe_id)
+
+    def _save_listing_index(self, conv_ids: list[str]) -> None:
+        """
+        Write cached metadata of conv_ids to the listing index if it changed
 
-    def _save_metadata(self, conversation_id: str, metadata: dict[str, Any]) -> None:
-        """Save metadata to file"""
-        meta_path = self._get_metadata_path(conversation_id)
+        The index is rewritten when a metadata file had to be parsed or a
+        listed conversation has no entry yet. Entries merely outdated by
+        this manager's own metadata writes don't trigger a rewrite: the
+        stat check makes the next process reparse just those files, so a
+        busy conversation doesn't cost an index rewrite per listing.
+        """
+        unindexed = (
+            conv_id
+            for conv_id in conv_ids
+            if conv_id in self._meta_cache and conv_id not in self._indexed_ids
+        )
+        if not self._index_dirty and next(unindexed, None) is None:
+            return
+        self._index_dirty = False
+        index = {}
+        for conv_id in conv_ids:
+            cached = self._meta_cache.get(conv_id)
+            if cached is not None:
+                index[conv_id] = [*cached[0], cached[1]]
+        # Replace atomically so a concurrent reader never sees a partial index
+        tmp_path = self._index_path.with_name(f"{LISTING_INDEX_NAME}.{os.getpid()}")
+        with open(tmp_path, "wb") as f:
+            f.write(dumps(index))
+        os.replace(tmp_path, self._index_path)
+        self._indexed_ids = set(index)
+
+    def _get_message_count(self, safe_id: str, conv_path: Path) -> int:
+        """
+        Count the messages read_messages would return
 
-        with open(meta_path, "w", encoding="utf-8") as f:
-            json.dump(metadata, f, indent=2, ensure_ascii=False)
-            f.flush()
-            os.fsync(f.fileno())  # Ensure durability
+        The count is cached together with the file size it was taken at, so
+        a file changed by anyone else is recounted on the next call. Appends
+        keep it current, so a conversation is only counted once.
+        """
+        try:
+            st = conv_path.stat()
+        except FileNotFoundError:
+            return 0
+        size = st.st_size
+
+        cached = self._message_counts.get(safe_id)
+        if cached and cached[0] == size:
+            return cached[1]
+
+        # A current full read already knows the answer
+        read = self._message_cache.get(safe_id)
+        if read and read[0] == (st.st_mtime_ns, size):
+            count = len(read[1])
+        else:
+            # Decodable non-blank lines: read_messages skips corrupt ones
+            count = 0
+            with open(conv_path, "rb") as f:
+                for line in f:
+                    if line.isspace():
+                        continue
+                    try:
+                        loads(line)
+                    except (JSONDecodeError, UnicodeDecodeError):
+                        continue
+                    count += 1
+
+        self._message_counts[safe_id] = (size, count)
+        return count
 
-    def _update_metadata_on_append(self, conversation_id: str, speaker: str) -> None:
-        """Update metadata after appending a message"""
-        metadata = self.get_metadata(conversation_id)
+    def _save_metadata(self, conversation_id: str, metadata: dict[str, Any]) -> None:
+        """Save metadata to file, superseding any deferred update"""
+        safe_id = self._sanitize_id(conversation_id)
+        with self._metadata_write_lock:
+            with self._dirty_lock:
+                self._pending_metadata.pop(safe_id, None)
+            self._write_metadata(safe_id, metadata)
+
+    def _write_metadata(self, conversation_id: str, metadata: dict[str, Any]) -> None:
+        """Write metadata to file and cache what was written"""
+        safe_id, _, meta_path = self._paths(conversation_id)
+
+        with open(meta_path, "wb") as f:
+            f.write(dumps(metadata, indent=True))
+            self._sync(f, meta_path)
+            st = os.fstat(f.fileno())
+
+        # What we just wrote is what the next read would parse
+        self._meta_cache[safe_id] = (
+            (st.st_mtime_ns, st.st_size),
+            metadata,
+        )
+
+    def _update_metadata_on_append(
+        self,
+        conversation_id: str,
+        speakers: list[str],
+        timestamp: str,
+        message_count: int,
+    ) -> None:
+        """Update metadata after appending messages up to the message_count-th"""
+        # Copy: cached and pending dicts are shared with readers
+        metadata = dict(self.get_metadata(conversation_id))
 
         # Update fields
-        metadata["updated_at"] = datetime.now().isoformat()
-        metadata["message_count"] = self._count_messages(conversation_id)
-
-        # Add speaker to participants if new
-        if speaker not in metadata["participants"]:
-            metadata["participants"].append(speaker)
+        metadata["updated_at"] = timestamp
+        metadata["message_count"] = message_count
+
+        # Add speakers to participants if new
+        new_speakers = [
+            speaker
+            for speaker in dict.fromkeys(speakers)
+            if speaker not in metadata["participants"]
+        ]
+        if new_speakers:
+            metadata["participants"] = [*metadata["participants"], *new_speakers]
+
+        if self.metadata_flush_interval is None:
+            self._save_metadata(conversation_id, metadata)
+            return
 
-        self._save_metadata(conversation_id, metadata)
+        # Defer the rewrite; bursts of appends are written once
+        with self._dirty_lock:
+            self._pending_metadata[self._sanitize_id(conversation_id)] = metadata
+            if self._metadata_timer is None:
+                self._metadata_timer = threading.Timer(
+                    self.metadata_flush_interval, self.flush_metadata
+                )
+                self._metadata_timer.daemon = True
+                self._metadata_timer.start()
+
+    def flush_metadata(self) -> None:
+        """Write metadata whose update was deferred"""
+        with self._dirty_lock:
+            pending = list(self._pending_metadata.items())
+            if self._metadata_timer is not None:
+                self._metadata_timer.cancel()
+                self._metadata_timer = None
+
+        for safe_id, metadata in pending:
+            with self._metadata_write_lock:
+                # Skip it if it was saved directly or replaced by another
+                # append since the snapshot; the file may already be newer
+                with self._dirty_lock:
+                    if self._pending_metadata.get(safe_id) is not metadata:
+                        continue
+                self._write_metadata(safe_id, metadata)
+                with self._dirty_lock:
+                    # Keep it pending if another append replaced it meanwhile
+                    if self._pending_metadata.get(safe_id) is metadata:
+                        del self._pending_metadata[safe_id]
 
     def _generate_metadata(self, conversation_id: str) -> dict[str, Any]:
         """Generate metadata from conversation file"""
@@ -315,17 +869,19 @@ class ConversationManager:
         messages = self.read_messages(conversation_id)
 
         if not messages:
+            now = datetime.now().isoformat()
             return {
                 "id": conversation_id,
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat(),
+                "created_at": now,
+                "updated_at": now,
                 "participants": [],
                 "message_count": 0,
                 "topic": "",
                 "status": "active",
             }
 
-        participants = list(set(msg["speaker"] for msg in messages))
+        # Ordered dedup: participants in order of first appearance
+        participants = list(dict.fromkeys(msg["speaker"] for msg in messages))
 
         metadata = {
             "id": conversation_id,
@@ -346,37 +902,48 @@ class ConversationManager:
         Migrate legacy .json file to .jsonl format if needed.
         Creates backup as .json.bak
         """
-        safe_id = self._sanitize_id(conversation_id)
-        legacy_path = self.conversation_dir / f"{safe_id}.json"
-        jsonl_path = self._get_conversation_path(conversation_id)
+        safe_id, jsonl_path, _ = self._paths(conversation_id)
+        if safe_id in self._migrated:
+            return
 
         # If JSONL file exists, no migration needed
         if jsonl_path.exists():
+            self._migrated.add(safe_id)
             return
 
+        legacy_path = self._get_legacy_path(conversation_id)
+
         # If legacy JSON doesn't exist, nothing to migrate
         if not legacy_path.exists():
             return
 
         # Read legacy JSON file
         try:
-            with open(legacy_path, encoding="utf-8") as f:
-                messages = json.load(f)
-        except (json.JSONDecodeError, OSError) as e:
+            src = open(legacy_path, "rb")
+        except OSError as e:
             print(f"Warning: Failed to read legacy file {legacy_path}: {e}")
             return
 
-        # Write to JSONL format
-        try:
-            with open(jsonl_path, "w", encoding="utf-8") as f:
-                for message in messages:
-                    json.dump(message, f, ensure_ascii=False)
-                    f.write("\n")
-                f.flush()
-                os.fsync(f.fileno())
-        except OSError as e:
-            print(f"Warning: Failed to write JSONL file {jsonl_path}: {e}")
-            return
+        # Convert to JSONL format message by message; a partial file is
+        # removed so the conversation isn't mistaken for migrated
+        with src:
+            try:
+                with open(jsonl_path, "wb") as f:
+                    for message in _iter_legacy_messages(src):
+                        f.write(dumps(message, newline=True))
+                    # Always synced: the legacy file is renamed away right after
+                    f.flush()
+                    os.fsync(f.fileno())
+            except _LEGACY_DECODE_ERRORS as e:
+                jsonl_path.unlink(missing_ok=True)
+                print(f"Warning: Failed to read legacy file {legacy_path}: {e}")
+                return
+            except OSError as e:
+                jsonl_path.unlink(missing_ok=True)
+                print(f"Warning: Failed to write JSONL file {jsonl_path}: {e}")
+                return
+
+        self._migrated.add(safe_id)
 
         # Backup original as .json.bak
         backup_path = self.conversation_dir / f"{safe_id}.json.bak"
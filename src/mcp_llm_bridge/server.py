@@ -1,10 +1,13 @@
 """MCP server implementation"""
 
+import asyncio
 import os
 from pathlib import Path
+from typing import Any
 
 from fastmcp import FastMCP, Context
 
+from ._json import dumps
 from .conversation import ConversationManager
 from .adapters import AdapterManager
 from .context_selector import ContextSelector
@@ -18,8 +21,20 @@ ADAPTER_CONFIG = Path(
     os.getenv("ADAPTER_CONFIG", "~/.mcp-llm-bridge/adapters.json")
 ).expanduser()
 
+# Durability of conversation writes: always, batch, or none
+FSYNC_MODE = os.getenv("FSYNC_MODE", "batch")
+
+# Seconds to defer metadata rewrites after appends (unset: write every append)
+METADATA_FLUSH_INTERVAL = os.getenv("METADATA_FLUSH_INTERVAL")
+
 # Initialize global components
-conversation_manager = ConversationManager(CONVERSATION_DIR)
+conversation_manager = ConversationManager(
+    CONVERSATION_DIR,
+    fsync_mode=FSYNC_MODE,
+    metadata_flush_interval=(
+        float(METADATA_FLUSH_INTERVAL) if METADATA_FLUSH_INTERVAL else None
+    ),
+)
 adapter_manager = AdapterManager(ADAPTER_CONFIG)
 context_selector = ContextSelector()
 
@@ -27,6 +42,58 @@ context_selector = ContextSelector()
 mcp = FastMCP("mcp-llm-bridge")
 
 
+def _to_json(obj: Any) -> str:
+    """Encode a tool response as a JSON string"""
+    return dumps(obj).decode("utf-8")
+
+
+def _selection_key(conversation_id: str, messages: list) -> tuple:
+    """Cache key for context selection over a conversation's current messages
+
+    The message count guards against appends made outside this process.
+    """
+    return (
+        conversation_id,
+        conversation_manager.get_version(conversation_id),
+        len(messages),
+    )
+
+
+async def _filter_context(
+    conversation_id: str,
+    messages: list,
+    selected_messages: list,
+    message: str,
+    context_mode: str,
+) -> list:
+    """Narrow a smart selection with the configured context filter adapter
+
+    Without a context_filter_adapter, a message, or smart mode, the selection
+    is returned unchanged.
+    """
+    filter_adapter = adapter_manager.context_filter_adapter
+    if context_mode != "smart" or not message or not filter_adapter:
+        return selected_messages
+
+    async def ask(prompt: str) -> str:
+        result = await adapter_manager.call_adapter(
+            adapter_name=filter_adapter,
+            message=prompt,
+            conversation_history=[],
+            pass_history=False,
+        )
+        if result["metadata"].get("error"):
+            raise RuntimeError(result["metadata"]["error"])
+        return result["response"]
+
+    return await context_selector.filter_relevant(
+        selected_messages,
+        message,
+        ask,
+        cache_key=(_selection_key(conversation_id, messages), context_mode),
+    )
+
+
 @mcp.tool()
 async def create_conversation(
     conversation_id: str | None = None,
@@ -44,8 +111,6 @@ async def create_conversation(
         host_name: Optional 2-word host identifier (e.g., "claude_moderator").
                    Will be prefixed with "host_". Defaults to "host" if not provided.
     """
-    global conversation_manager
-
     metadata = {"topic": topic} if topic else None
 
     result_id = conversation_manager.create_conversation(
@@ -63,9 +128,7 @@ async def create_conversation(
         "message": f"Created conversation: {result_id}",
     }
 
-    import json
-
-    return json.dumps(response)
+    return _to_json(response)
 
 
 @mcp.tool()
@@ -86,8 +149,6 @@ async def call_llm(
     it's sent alongside conversation history (if pass_history=true). Empty message makes
     the LLM respond only to existing conversation history.
     """
-    global conversation_manager, adapter_manager, context_selector
-
     # Report progress if context available
     if ctx:
         await ctx.info(
@@ -100,13 +161,19 @@ async def call_llm(
             f"Conversation '{conversation_id}' does not exist. Create it first with create_conversation."
         )
 
-    # Read conversation history
-    messages = conversation_manager.read_messages(conversation_id)
-
-    # Select context
+    # Read conversation history (served from the manager's read cache while
+    # the file is unchanged) and select context, memoized per conversation state
     selected_messages = []
     if pass_history:
-        selected_messages = context_selector.select(messages, context_mode)
+        messages = conversation_manager.read_messages(conversation_id)
+        selected_messages = context_selector.select(
+            messages,
+            context_mode,
+            cache_key=_selection_key(conversation_id, messages),
+        )
+        selected_messages = await _filter_context(
+            conversation_id, messages, selected_messages, message, context_mode
+        )
 
     # Call adapter
     result = await adapter_manager.call_adapter(
@@ -155,14 +222,12 @@ async def call_llm_parallel(
     Returns:
         JSON with responses from all adapters
     """
-    global conversation_manager, adapter_manager, context_selector
-    import asyncio
-    import json
+    adapter_count = len(adapter_names)
 
     # Report progress if context available
     if ctx:
         await ctx.info(
-            f"Calling {len(adapter_names)} adapters in parallel for conversation '{conversation_id}'"
+            f"Calling {adapter_count} adapters in parallel for conversation '{conversation_id}'"
         )
 
     # Validate inputs
@@ -175,80 +240,141 @@ async def call_llm_parallel(
             f"Conversation '{conversation_id}' does not exist. Create it first with create_conversation."
         )
 
-    # Read conversation history once
-    messages = conversation_manager.read_messages(conversation_id)
-
-    # Select context once (all adapters get same context)
+    # Read history and select context once (all adapters get same context)
     selected_messages = []
     if pass_history:
-        selected_messages = context_selector.select(messages, context_mode)
+        messages = conversation_manager.read_messages(conversation_id)
+        selected_messages = context_selector.select(
+            messages,
+            context_mode,
+            cache_key=_selection_key(conversation_id, messages),
+        )
+        selected_messages = await _filter_context(
+            conversation_id, messages, selected_messages, message, context_mode
+        )
+
+    # Format the shared history once instead of once per adapter
+    history_text = None
+    if pass_history and selected_messages:
+        history_text = adapter_manager.format_history(selected_messages)
 
     # Define async function to call single adapter
-    async def call_single_adapter(adapter_name: str) -> dict:
+    async def call_single_adapter(
+        index: int, adapter_name: str
+    ) -> tuple[int, dict | None, Exception | None]:
         try:
             result = await adapter_manager.call_adapter(
                 adapter_name=adapter_name,
                 message=message,
                 conversation_history=selected_messages,
                 pass_history=pass_history,
+                history_text=history_text,
+            )
+        except Exception as e:
+            return index, None, e
+        return index, result, None
+
+    # Call all adapters in parallel; responses are appended as they arrive,
+    # from this one coroutine, with adapters that finish together sharing a
+    # single write
+    tasks = [
+        asyncio.create_task(call_single_adapter(index, name))
+        for index, name in enumerate(adapter_names)
+    ]
+    results: list[dict] = [{}] * adapter_count
+    successful = 0
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
             )
 
-            # Check for errors
-            if result["metadata"].get("error"):
-                return {
-                    "adapter": adapter_name,
-                    "response": "",
-                    "error": result["metadata"]["error"],
+            succeeded = []
+            for task in done:
+                index, result, error = task.result()
+                adapter_name = adapter_names[index]
+
+                if error is not None:
+                    results[index] = {
+                        "adapter": adapter_name,
+                        "response": "",
+                        "error": str(error),
+                        "execution_time_ms": 0,
+                        "success": False,
+                    }
+                elif result["metadata"].get("error"):
+                    results[index] = {
+                        "adapter": adapter_name,
+                        "response": "",
+                        "error": result["metadata"]["error"],
+                        "execution_time_ms": result["metadata"].get(
+                            "execution_time_ms", 0
+                        ),
+                        "success": False,
+                    }
+                else:
+                    succeeded.append((index, result))
+
+            if not succeeded:
+                continue
+
+            # Append responses to conversation, in adapter_names order
+            succeeded.sort(key=lambda item: item[0])
+            try:
+                conversation_manager.append_messages(
+                    conversation_id,
+                    [
+                        {
+                            "speaker": adapter_names[index],
+                            "content": result["response"],
+                            "metadata": result["metadata"],
+                        }
+                        for index, result in succeeded
+                    ],
+                )
+            except Exception as e:
+                for index, _ in succeeded:
+                    results[index] = {
+                        "adapter": adapter_names[index],
+                        "response": "",
+                        "error": str(e),
+                        "execution_time_ms": 0,
+                        "success": False,
+                    }
+                continue
+
+            successful += len(succeeded)
+            for index, result in succeeded:
+                results[index] = {
+                    "adapter": adapter_names[index],
+                    "response": result["response"],
+                    "error": None,
                     "execution_time_ms": result["metadata"].get("execution_time_ms", 0),
-                    "success": False,
+                    "success": True,
                 }
-
-            # Append response to conversation
-            conversation_manager.append_message(
-                conversation_id=conversation_id,
-                speaker=adapter_name,
-                content=result["response"],
-                metadata=result["metadata"],
-            )
-
-            return {
-                "adapter": adapter_name,
-                "response": result["response"],
-                "error": None,
-                "execution_time_ms": result["metadata"].get("execution_time_ms", 0),
-                "success": True,
-            }
-
-        except Exception as e:
-            return {
-                "adapter": adapter_name,
-                "response": "",
-                "error": str(e),
-                "execution_time_ms": 0,
-                "success": False,
-            }
-
-    # Call all adapters in parallel
-    results = await asyncio.gather(
-        *[call_single_adapter(name) for name in adapter_names]
-    )
+    finally:
+        # Don't leave adapters running if this call is cancelled
+        for task in pending:
+            task.cancel()
 
     # Format response
     response = {
         "conversation_id": conversation_id,
-        "total_adapters": len(adapter_names),
-        "successful": sum(1 for r in results if r["success"]),
-        "failed": sum(1 for r in results if not r["success"]),
+        "total_adapters": adapter_count,
+        "successful": successful,
+        "failed": adapter_count - successful,
         "results": results,
     }
 
-    return json.dumps(response)
+    return _to_json(response)
 
 
 @mcp.tool()
 async def summarize_conversation(
     conversation_id: str,
     adapter_name: str | None = None,
+    refresh: bool = False,
     ctx: Context | None = None,
 ) -> str:
     """Generate a summary of the conversation using an LLM adapter
@@ -256,14 +382,12 @@ async def summarize_conversation(
     Args:
         conversation_id: Conversation identifier
         adapter_name: Optional adapter to use (defaults to default_summarization_adapter)
+        refresh: Ignore any stored summary and summarize the whole conversation
         ctx: Optional context for progress reporting
 
     Returns:
         Summary of the conversation
     """
-    global conversation_manager, adapter_manager
-    import json
-
     # Check if conversation exists
     if not conversation_manager.conversation_exists(conversation_id):
         raise ValueError(f"Conversation '{conversation_id}' does not exist.")
@@ -286,7 +410,7 @@ async def summarize_conversation(
     messages = conversation_manager.read_messages(conversation_id)
 
     if not messages:
-        return json.dumps(
+        return _to_json(
             {
                 "conversation_id": conversation_id,
                 "summary": "Empty conversation - no messages to summarize.",
@@ -294,17 +418,43 @@ async def summarize_conversation(
             }
         )
 
-    # Format conversation for summarization
-    conversation_text = []
-    for msg in messages:
-        speaker = msg.get("speaker", "unknown")
-        content = msg.get("content", "").replace("\n", " ")
-        conversation_text.append(f"{speaker}: {content}")
-
-    full_text = " | ".join(conversation_text)
+    # Reuse the last summary made by this adapter if it still describes the
+    # start of the conversation
+    cached = (
+        None if refresh else conversation_manager.get_cached_summary(conversation_id)
+    )
+    covered = 0
+    if cached and cached.get("adapter") == adapter_name:
+        count = cached.get("message_count", 0)
+        if 0 < count <= len(messages) and (
+            messages[count - 1].get("timestamp") == cached.get("last_timestamp")
+        ):
+            covered = count
+
+    if covered == len(messages):
+        # Nothing new since the last summary
+        return _to_json(
+            {
+                "conversation_id": conversation_id,
+                "summary": cached["summary"],
+                "message_count": len(messages),
+                "summarized_by": adapter_name,
+            }
+        )
 
-    # Create summarization prompt
-    prompt = f"Provide a concise summary of this conversation: {full_text}"
+    # Format conversation for summarization: the same compact
+    # "speaker: content | ..." form adapters receive as history
+    if covered:
+        # Only the messages since the last summary are sent
+        new_text = adapter_manager.format_history(messages[covered:])
+        prompt = (
+            "Update this conversation summary with the new messages and provide "
+            f"a concise summary of the whole conversation. Summary so far: "
+            f"{cached['summary']} | New messages: {new_text}"
+        )
+    else:
+        full_text = adapter_manager.format_history(messages)
+        prompt = f"Provide a concise summary of this conversation: {full_text}"
 
     # Call adapter for summarization
     result = await adapter_manager.call_adapter(
@@ -319,27 +469,36 @@ async def summarize_conversation(
         error_msg = result["metadata"]["error"]
         raise ValueError(f"Error generating summary with '{adapter_name}': {error_msg}")
 
+    summary = result["response"].strip()
+    if summary:
+        conversation_manager.save_summary(
+            conversation_id, summary, messages, adapter_name
+        )
+
     # Return summary
     response = {
         "conversation_id": conversation_id,
-        "summary": result["response"].strip(),
+        "summary": summary,
         "message_count": len(messages),
         "summarized_by": adapter_name,
     }
 
-    return json.dumps(response)
+    return _to_json(response)
 
 
 @mcp.tool()
 async def get_recent_messages(conversation_id: str, count: int = 5) -> str:
     """Get N most recent messages from a conversation"""
-    global conversation_manager
-
     if not conversation_manager.conversation_exists(conversation_id):
         raise ValueError(f"Conversation '{conversation_id}' does not exist.")
 
-    messages = conversation_manager.read_messages(conversation_id)
-    recent = messages[-count:] if len(messages) > count else messages
+    # Only the tail of the file is parsed; a non-positive count has always
+    # meant the whole conversation
+    recent = (
+        conversation_manager.read_messages(conversation_id, start=-count)
+        if count > 0
+        else conversation_manager.read_messages(conversation_id)
+    )
 
     # Format as compact text
     lines = []
@@ -356,39 +515,29 @@ async def get_recent_messages(conversation_id: str, count: int = 5) -> str:
 @mcp.tool()
 async def get_conversation_summary(conversation_id: str) -> str:
     """Get high-level summary and metadata about a conversation"""
-    global conversation_manager
-
     if not conversation_manager.conversation_exists(conversation_id):
         raise ValueError(f"Conversation '{conversation_id}' does not exist.")
 
     metadata = conversation_manager.get_metadata(conversation_id)
 
-    import json
-
-    return json.dumps(metadata)
+    return _to_json(metadata)
 
 
 @mcp.tool()
 async def list_conversations(limit: int = 20, sort_by: str = "updated_at") -> str:
     """List all available conversations"""
-    global conversation_manager
-
     conversations = conversation_manager.list_conversations(
         limit=limit, sort_by=sort_by, order="desc"
     )
 
-    import json
-
     result = {"total": len(conversations), "conversations": conversations}
 
-    return json.dumps(result)
+    return _to_json(result)
 
 
 @mcp.tool()
 async def list_adapters(test_availability: bool = False) -> str:
     """List all configured LLM adapters"""
-    global adapter_manager
-
     adapters_info = adapter_manager.list_adapters()
 
     # Optionally test availability
@@ -397,9 +546,7 @@ async def list_adapters(test_availability: bool = False) -> str:
             is_available = await adapter_manager.test_adapter(adapter["name"])
             adapter["available"] = is_available
 
-    import json
-
-    return json.dumps(adapters_info)
+    return _to_json(adapters_info)
 
 
 if __name__ == "__main__":
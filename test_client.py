@@ -3,20 +3,39 @@
 
 import asyncio
 import json
-import subprocess
 import sys
 
 
+async def send_request(server_proc, request):
+    """Write one JSON-RPC message without waiting for its response"""
+    server_proc.stdin.write((json.dumps(request) + "\n").encode())
+    await server_proc.stdin.drain()
+
+
+async def read_responses(server_proc, count):
+    """Read count JSON-RPC responses, keyed by request id"""
+    responses = {}
+    while len(responses) < count:
+        response_line = await server_proc.stdout.readline()
+        if not response_line:
+            break
+        response = json.loads(response_line)
+        if "id" in response:
+            responses[response["id"]] = response
+    return responses
+
+
 async def test_mcp_server():
     """Test the MCP server by sending JSON-RPC messages"""
 
     # Start the server process
-    server_proc = subprocess.Popen(
-        [sys.executable, "-m", "mcp_llm_bridge.server"],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
+    server_proc = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "mcp_llm_bridge.server",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
     )
 
     try:
@@ -32,17 +51,15 @@ async def test_mcp_server():
             },
         }
 
-        # Send request
-        request_str = json.dumps(init_request) + "\n"
-        server_proc.stdin.write(request_str)
-        server_proc.stdin.flush()
-
-        # Read response
-        response_line = server_proc.stdout.readline()
-        if response_line:
-            response = json.loads(response_line.strip())
+        # The handshake has to complete before any other request
+        await send_request(server_proc, init_request)
+        response = (await read_responses(server_proc, 1)).get(1)
+        if response:
             print("✅ Initialize response:")
             print(json.dumps(response, indent=2))
+        await send_request(
+            server_proc, {"jsonrpc": "2.0", "method": "notifications/initialized"}
+        )
 
         # Send list_tools request
         tools_request = {
@@ -52,20 +69,6 @@ async def test_mcp_server():
             "params": {},
         }
 
-        request_str = json.dumps(tools_request) + "\n"
-        server_proc.stdin.write(request_str)
-        server_proc.stdin.flush()
-
-        # Read response
-        response_line = server_proc.stdout.readline()
-        if response_line:
-            response = json.loads(response_line.strip())
-            print("\n✅ Tools list response:")
-            tools = response.get("result", {}).get("tools", [])
-            print(f"Found {len(tools)} tools:")
-            for tool in tools:
-                print(f"  - {tool['name']}: {tool['description']}")
-
         # Test create_conversation
         create_conv_request = {
             "jsonrpc": "2.0",
@@ -80,20 +83,6 @@ async def test_mcp_server():
             },
         }
 
-        request_str = json.dumps(create_conv_request) + "\n"
-        server_proc.stdin.write(request_str)
-        server_proc.stdin.flush()
-
-        # Read response
-        response_line = server_proc.stdout.readline()
-        if response_line:
-            response = json.loads(response_line.strip())
-            print("\n✅ Create conversation response:")
-            result = response.get("result", {})
-            if result and "content" in result and result["content"]:
-                content = result["content"][0]
-                print(f"Status: {content['text']}")
-
         # Test list_adapters
         list_adapters_request = {
             "jsonrpc": "2.0",
@@ -102,14 +91,30 @@ async def test_mcp_server():
             "params": {"name": "list_adapters", "arguments": {}},
         }
 
-        request_str = json.dumps(list_adapters_request) + "\n"
-        server_proc.stdin.write(request_str)
-        server_proc.stdin.flush()
+        # Pipeline the remaining requests, then collect all responses
+        requests = [tools_request, create_conv_request, list_adapters_request]
+        for request in requests:
+            await send_request(server_proc, request)
+        responses = await read_responses(server_proc, len(requests))
+
+        response = responses.get(2)
+        if response:
+            print("\n✅ Tools list response:")
+            tools = response.get("result", {}).get("tools", [])
+            print(f"Found {len(tools)} tools:")
+            for tool in tools:
+                print(f"  - {tool['name']}: {tool['description']}")
+
+        response = responses.get(3)
+        if response:
+            print("\n✅ Create conversation response:")
+            result = response.get("result", {})
+            if result and "content" in result and result["content"]:
+                content = result["content"][0]
+                print(f"Status: {content['text']}")
 
-        # Read response
-        response_line = server_proc.stdout.readline()
-        if response_line:
-            response = json.loads(response_line.strip())
+        response = responses.get(4)
+        if response:
             print("\n✅ List adapters response:")
             result = response.get("result", {})
             if result and "content" in result and result["content"]:
@@ -125,17 +130,24 @@ async def test_mcp_server():
     except Exception as e:
         print(f"❌ Error: {e}")
         # Print any stderr output
-        _, stderr_output = server_proc.communicate(timeout=1)
+        server_proc.terminate()
+        try:
+            _, stderr_output = await asyncio.wait_for(
+                server_proc.communicate(), timeout=1
+            )
+        except asyncio.TimeoutError:
+            stderr_output = b""
         if stderr_output:
-            print(f"Server stderr: {stderr_output}")
+            print(f"Server stderr: {stderr_output.decode(errors='replace')}")
 
     finally:
         # Clean up
-        try:
-            server_proc.terminate()
-            server_proc.wait(timeout=5)
-        except Exception:
-            server_proc.kill()
+        if server_proc.returncode is None:
+            try:
+                server_proc.terminate()
+                await asyncio.wait_for(server_proc.wait(), timeout=5)
+            except Exception:
+                server_proc.kill()
 
 
 if __name__ == "__main__":
@@ -1,8 +1,12 @@
 """Tests for adapter management"""
 
+import asyncio
 import pytest
 import json
-from mcp_llm_bridge.adapters import AdapterManager, AdapterConfig
+import os
+import shutil
+import sys
+from mcp_llm_bridge.adapters import AdapterManager, AdapterConfig, STDIN_CHUNK_SIZE
 
 
 @pytest.fixture
@@ -13,9 +17,9 @@ def temp_adapter_manager(tmp_path):
     return manager
 
 
-@pytest.fixture
-def echo_adapter_config(tmp_path):
-    """Create a simple adapter configuration for testing"""
+@pytest.fixture(scope="session")
+def echo_adapter_config(tmp_path_factory):
+    """Create a simple adapter configuration for testing (shared, read-only)"""
     config = {
         "adapters": {
             "echo": {
@@ -44,7 +48,7 @@ def echo_adapter_config(tmp_path):
         "default_adapter": "echo",
     }
 
-    config_path = tmp_path / "adapters.json"
+    config_path = tmp_path_factory.mktemp("adapter_cfg") / "adapters.json"
     with open(config_path, "w") as f:
         json.dump(config, f)
 
@@ -81,7 +85,7 @@ async def test_call_arg_adapter(echo_adapter_config):
 
 
 @pytest.mark.asyncio
-async def test_adapter_with_history(echo_adapter_config):
+async def test_adapter_with_history(tmp_path):
     """Test adapter with conversation history"""
 
     # Use cat command that will echo input
@@ -97,7 +101,7 @@ async def test_adapter_with_history(echo_adapter_config):
         }
     }
 
-    config_path = echo_adapter_config.parent / "cat_config.json"
+    config_path = tmp_path / "cat_config.json"
     with open(config_path, "w") as f:
         json.dump(cat_config, f)
 
@@ -120,6 +124,17 @@ async def test_adapter_with_history(echo_adapter_config):
     assert "Previous response" in result["response"]
     assert "New message" in result["response"]
 
+    # Preformatted history is sent as given
+    result = await cat_manager.call_adapter(
+        adapter_name="cat",
+        message="New message",
+        conversation_history=history,
+        pass_history=True,
+        history_text=cat_manager.format_history(history),
+    )
+    expected = cat_manager.format_history(history) + " | New message"
+    assert result["response"] == expected
+
 
 @pytest.mark.asyncio
 async def test_adapter_without_history(echo_adapter_config):
@@ -140,6 +155,39 @@ async def test_adapter_without_history(echo_adapter_config):
     assert "Previous message" not in result["response"]
 
 
+@pytest.mark.asyncio
+async def test_adapter_large_stdin_payload(echo_adapter_config):
+    """Test that payloads larger than one stdin chunk arrive intact"""
+    manager = AdapterManager(echo_adapter_config)
+    message = "x" * (STDIN_CHUNK_SIZE * 3 + 17)
+
+    result = await manager.call_adapter(
+        adapter_name="echo", message=message, pass_history=False
+    )
+
+    assert result["response"] == message
+    assert result["metadata"]["exit_code"] == 0
+
+
+@pytest.mark.asyncio
+async def test_adapter_large_stdin_unread(tmp_path):
+    """Test that a command ignoring a large stdin payload does not fail"""
+    config = {
+        "adapters": {"ignore": {"type": "bash", "command": "echo", "args": ["ignored"]}}
+    }
+
+    config_path = tmp_path / "adapters.json"
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+
+    manager = AdapterManager(config_path)
+
+    result = await manager.call_adapter("ignore", "x" * (STDIN_CHUNK_SIZE * 4))
+
+    assert result["response"] == "ignored"
+    assert result["metadata"]["error"] is None
+
+
 @pytest.mark.asyncio
 async def test_nonexistent_adapter(echo_adapter_config):
     """Test calling a nonexistent adapter"""
@@ -180,6 +228,80 @@ async def test_unsupported_adapter_type(tmp_path):
         await manager.call_adapter("unsupported", "test")
 
 
+def uppercase_adapter(message, history):
+    """In-process adapter used by the python_callable tests"""
+    return " | ".join([m["content"] for m in history] + [message]).upper()
+
+
+async def async_reverse_adapter(message, history):
+    """Async in-process adapter used by the python_callable tests"""
+    return message[::-1]
+
+
+@pytest.fixture
+def python_adapter_config(tmp_path):
+    """Create a configuration with python_callable adapters"""
+    config = {
+        "adapters": {
+            "upper": {
+                "type": "python_callable",
+                "module": "tests.test_adapters",
+                "function": "uppercase_adapter",
+            },
+            "reverse": {
+                "type": "python_callable",
+                "module": "tests.test_adapters",
+                "function": "async_reverse_adapter",
+            },
+            "missing": {
+                "type": "python_callable",
+                "module": "tests.test_adapters",
+                "function": "does_not_exist",
+            },
+        }
+    }
+
+    config_path = tmp_path / "adapters.json"
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+
+    return config_path
+
+
+@pytest.mark.asyncio
+async def test_python_callable_adapter(python_adapter_config):
+    """Test calling sync and async in-process function adapters"""
+    manager = AdapterManager(python_adapter_config)
+    history = [{"speaker": "user", "content": "earlier"}]
+
+    result = await manager.call_adapter("upper", "hello", conversation_history=history)
+    assert result["response"] == "EARLIER | HELLO"
+    assert result["metadata"]["exit_code"] == 0
+    assert result["metadata"]["error"] is None
+
+    result = await manager.call_adapter(
+        "upper", "hello", conversation_history=history, pass_history=False
+    )
+    assert result["response"] == "HELLO"
+
+    result = await manager.call_adapter("reverse", "abc")
+    assert result["response"] == "cba"
+
+
+@pytest.mark.asyncio
+async def test_python_callable_adapter_missing_function(python_adapter_config):
+    """Test that an unresolvable function is reported, not raised"""
+    manager = AdapterManager(python_adapter_config)
+
+    result = await manager.call_adapter("missing", "hello")
+    assert result["response"] == ""
+    assert result["metadata"]["exit_code"] == -1
+    assert "does_not_exist" in result["metadata"]["error"]
+
+    assert await manager.test_adapter("upper")
+    assert not await manager.test_adapter("missing")
+
+
 def test_list_adapters(echo_adapter_config):
     """Test listing adapters"""
     manager = AdapterManager(echo_adapter_config)
@@ -236,6 +358,56 @@ def test_adapter_config():
     assert adapter.config == config
 
 
+def test_adapter_config_precomputed_fields():
+    """Test AdapterConfig resolves execution settings at load time"""
+    config = {
+        "type": "bash",
+        "command": "llm",
+        "args": ["--model", "x", "--prompt={message}"],
+        "input_method": "arg",
+        "timeout_seconds": 10,
+    }
+
+    adapter = AdapterConfig("test", config)
+
+    assert adapter.command == "llm"
+    assert adapter.args == ("--model", "x", "--prompt={message}")
+    assert adapter.input_method == "arg"
+    assert adapter.timeout == 10
+    assert adapter.working_dir is None
+    assert adapter.arg_template_indices == (2,)
+    assert adapter.env is None  # No overrides: inherit the parent environment
+
+    adapter = AdapterConfig("test", {**config, "env": {"TEST_VAR": "x"}})
+    assert adapter.env["TEST_VAR"] == "x"
+    assert adapter.env["PATH"] == os.environ["PATH"]
+
+
+@pytest.mark.asyncio
+async def test_arg_adapter_with_template(tmp_path):
+    """Test that {message} templates in args are filled in place"""
+    config = {
+        "adapters": {
+            "template": {
+                "type": "bash",
+                "command": "echo",
+                "args": ["[{message}]", "done"],
+                "input_method": "arg",
+            }
+        }
+    }
+
+    config_path = tmp_path / "adapters.json"
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+
+    manager = AdapterManager(config_path)
+
+    result = await manager.call_adapter("template", "hi", pass_history=False)
+
+    assert result["response"] == "[hi] done"
+
+
 @pytest.mark.asyncio
 async def test_adapter_with_env_and_timeout(tmp_path):
     """Test adapter with environment variables and timeout"""
@@ -265,6 +437,249 @@ async def test_adapter_with_env_and_timeout(tmp_path):
     assert result["metadata"]["exit_code"] == 0
 
 
+@pytest.mark.asyncio
+async def test_adapter_stderr_only_reported_on_failure(tmp_path):
+    """Test stderr is ignored on success and reported as error on failure"""
+    config = {
+        "adapters": {
+            "noisy-ok": {
+                "type": "bash",
+                "command": "sh",
+                "args": ["-c", "echo progress >&2; echo done"],
+            },
+            "noisy-fail": {
+                "type": "bash",
+                "command": "sh",
+                "args": ["-c", "echo boom >&2; exit 3"],
+            },
+        }
+    }
+
+    config_path = tmp_path / "adapters.json"
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+
+    manager = AdapterManager(config_path)
+
+    result = await manager.call_adapter("noisy-ok", "test")
+    assert result["response"] == "done"
+    assert result["metadata"]["error"] is None
+
+    result = await manager.call_adapter("noisy-fail", "test")
+    assert result["metadata"]["exit_code"] == 3
+    assert result["metadata"]["error"] == "boom"
+
+
+@pytest.mark.asyncio
+async def test_adapter_timeout(tmp_path):
+    """Test that a command exceeding its timeout is reported as an error"""
+    config = {
+        "adapters": {
+            "slow": {
+                "type": "bash",
+                "command": "sleep",
+                "args": ["5"],
+                "input_method": "arg",
+                "timeout_seconds": 0.2,
+            }
+        }
+    }
+
+    config_path = tmp_path / "adapters.json"
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+
+    manager = AdapterManager(config_path)
+
+    result = await manager.call_adapter("slow", "")
+
+    assert result["response"] == ""
+    assert result["metadata"]["exit_code"] == -1
+    assert "timed out" in result["metadata"]["error"]
+
+
+# Echo server for persistent adapters: replies "<pid>:<request>" per NUL-framed request
+PERSISTENT_ECHO_SCRIPT = """
+import os
+buf = b""
+while True:
+    chunk = os.read(0, 65536)
+    if not chunk:
+        break
+    buf += chunk
+    while b"\\0" in buf:
+        request, buf = buf.split(b"\\0", 1)
+        os.write(1, str(os.getpid()).encode() + b":" + request + b"\\0")
+"""
+
+
+@pytest.mark.asyncio
+async def test_persistent_adapter_reuses_process(tmp_path):
+    """Test that a persistent adapter serves several calls from one process"""
+    config = {
+        "adapters": {
+            "persistent-echo": {
+                "type": "bash",
+                "command": sys.executable,
+                "args": ["-c", PERSISTENT_ECHO_SCRIPT],
+                "input_method": "stdin",
+                "persistent": True,
+            }
+        }
+    }
+
+    config_path = tmp_path / "adapters.json"
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+
+    manager = AdapterManager(config_path)
+
+    try:
+        first = await manager.call_adapter("persistent-echo", "one")
+        second = await manager.call_adapter(
+            "persistent-echo",
+            "two",
+            conversation_history=[{"speaker": "user", "content": "earlier"}],
+        )
+    finally:
+        await manager.close()
+
+    pid1, _, response1 = first["response"].partition(":")
+    pid2, _, response2 = second["response"].partition(":")
+    assert response1 == "one"
+    assert response2 == "user: earlier | two"
+    assert pid1 == pid2
+    assert first["metadata"]["error"] is None
+
+
+@pytest.mark.asyncio
+async def test_persistent_adapter_discards_process_on_cancel(tmp_path):
+    """Test that a cancelled persistent call doesn't leak its reply to the next"""
+    script = PERSISTENT_ECHO_SCRIPT.replace(
+        "os.write(1,", 'request == b"slow" and time.sleep(0.5); os.write(1,'
+    ).replace("import os", "import os, time")
+    config = {
+        "adapters": {
+            "persistent-echo": {
+                "type": "bash",
+                "command": sys.executable,
+                "args": ["-c", script],
+                "input_method": "stdin",
+                "persistent": True,
+            }
+        }
+    }
+
+    config_path = tmp_path / "adapters.json"
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+
+    manager = AdapterManager(config_path)
+
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                manager.call_adapter("persistent-echo", "slow"), timeout=0.1
+            )
+        result = await manager.call_adapter("persistent-echo", "fast")
+    finally:
+        await manager.close()
+
+    assert result["response"].partition(":")[2] == "fast"
+
+
+@pytest.mark.asyncio
+async def test_persistent_adapter_respawns_after_exit(tmp_path):
+    """Test that a persistent process that exits is reported and replaced"""
+    config = {
+        "adapters": {
+            "exits": {
+                "type": "bash",
+                "command": "true",
+                "input_method": "stdin",
+                "persistent": True,
+            }
+        }
+    }
+
+    config_path = tmp_path / "adapters.json"
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+
+    manager = AdapterManager(config_path)
+
+    try:
+        for _ in range(2):
+            result = await manager.call_adapter("exits", "hello")
+            assert result["metadata"]["exit_code"] == -1
+            assert result["metadata"]["error"]
+    finally:
+        await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_persistent_adapter_reload_replaces_processes(tmp_path):
+    """Test that reloading the config retires the pooled processes"""
+    config = {
+        "adapters": {
+            "persistent-echo": {
+                "type": "bash",
+                "command": sys.executable,
+                "args": ["-c", PERSISTENT_ECHO_SCRIPT],
+                "input_method": "stdin",
+                "persistent": True,
+            }
+        }
+    }
+
+    config_path = tmp_path / "adapters.json"
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+
+    manager = AdapterManager(config_path)
+
+    try:
+        first = await manager.call_adapter("persistent-echo", "one")
+        pool = manager._pools["persistent-echo"]
+        old_process = pool.get_nowait()
+        pool.put_nowait(old_process)
+        manager.load_adapters()
+        second = await manager.call_adapter("persistent-echo", "two")
+    finally:
+        await manager.close()
+
+    assert await asyncio.wait_for(old_process.wait(), timeout=5) != 0
+    assert first["response"].partition(":")[0] != second["response"].partition(":")[0]
+
+
+def test_invalid_pool_size_falls_back(tmp_path):
+    """Test that an unusable pool_size doesn't stop the config from loading"""
+    config = {
+        "adapters": {
+            name: {"type": "bash", "command": "cat", "persistent": True, **extra}
+            for name, extra in {
+                "null": {"pool_size": None},
+                "text": {"pool_size": "many"},
+                "zero": {"pool_size": 0},
+                "three": {"pool_size": "3"},
+            }.items()
+        }
+    }
+
+    config_path = tmp_path / "adapters.json"
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+
+    manager = AdapterManager(config_path)
+
+    assert {name: a.pool_size for name, a in manager.adapters.items()} == {
+        "null": 1,
+        "text": 1,
+        "zero": 1,
+        "three": 3,
+    }
+
+
 @pytest.mark.asyncio
 async def test_test_adapter_available(echo_adapter_config):
     """Test adapter availability testing"""
@@ -279,6 +694,22 @@ async def test_test_adapter_available(echo_adapter_config):
     assert not is_available
 
 
+@pytest.mark.asyncio
+async def test_test_adapter_cached(echo_adapter_config):
+    """Test adapter availability results are cached until the TTL expires"""
+    manager = AdapterManager(echo_adapter_config)
+
+    assert await manager.test_adapter("echo")
+
+    # Break the command; cached result is still returned
+    manager.adapters["echo"].command = "nonexistent-command-12345"
+    assert await manager.test_adapter("echo")
+
+    # Expired cache re-probes the command
+    manager.availability_ttl = 0
+    assert not await manager.test_adapter("echo")
+
+
 @pytest.mark.asyncio
 async def test_test_adapter_unknown(echo_adapter_config):
     """Test testing unknown adapter"""
@@ -288,6 +719,26 @@ async def test_test_adapter_unknown(echo_adapter_config):
         await manager.test_adapter("unknown-adapter")
 
 
+@pytest.mark.asyncio
+async def test_test_adapter_sparse_config(tmp_path):
+    """Test probing adapters with a null env or no command"""
+    config = {
+        "adapters": {
+            "null-env": {"type": "bash", "command": "cat", "env": None},
+            "no-command": {"type": "bash"},
+        }
+    }
+
+    config_path = tmp_path / "adapters.json"
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+
+    manager = AdapterManager(config_path)
+
+    assert await manager.test_adapter("null-env")
+    assert not await manager.test_adapter("no-command")
+
+
 def test_load_adapters_with_existing_config(echo_adapter_config):
     """Test loading adapters from existing config"""
     manager = AdapterManager(echo_adapter_config)
@@ -301,3 +752,25 @@ def test_load_adapters_with_existing_config(echo_adapter_config):
     assert isinstance(echo_adapter, AdapterConfig)
     assert echo_adapter.name == "echo"
     assert echo_adapter.type == "bash"
+
+
+def test_load_adapters_picks_up_config_changes(echo_adapter_config, tmp_path):
+    """Test reloading adapters after the config file changes"""
+    # Edit a copy; the shared config must stay unchanged
+    config_path = tmp_path / "adapters.json"
+    shutil.copy(echo_adapter_config, config_path)
+    manager = AdapterManager(config_path)
+    assert "echo" in manager.adapters
+
+    config = {
+        "adapters": {
+            "cat": {"type": "bash", "command": "cat", "description": "Cat adapter"}
+        },
+        "default_adapter": "cat",
+    }
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+
+    manager = AdapterManager(config_path)
+    assert list(manager.adapters) == ["cat"]
+    assert manager.default_adapter == "cat"
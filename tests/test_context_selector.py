@@ -1,5 +1,7 @@
 """Tests for context selection"""
 
+import random
+
 import pytest
 from mcp_llm_bridge.context_selector import ContextSelector
 
@@ -168,3 +170,133 @@ def test_context_selection_with_message_structure(context_selector):
     assert selected[1]["turn"] == 2
     assert selected[1]["speaker"] == "assistant"
     assert selected[1]["metadata"]["tokens"] == 15
+
+
+def test_select_with_cache_key_memoizes(context_selector, sample_messages):
+    """Test that selections with the same cache key are reused"""
+    first = context_selector.select(sample_messages, "smart", cache_key=("c", 1))
+    second = context_selector.select(sample_messages, "smart", cache_key=("c", 1))
+    assert second is first
+
+    # A different key or mode computes a fresh selection
+    longer = sample_messages + [{"turn": 9, "speaker": "user", "content": "New"}]
+    updated = context_selector.select(longer, "smart", cache_key=("c", 2))
+    assert len(updated) == 9
+    assert context_selector.select(longer, "minimal", cache_key=("c", 2)) == [
+        longer[-1]
+    ]
+
+
+def test_select_cache_is_bounded(sample_messages):
+    """Test that the selection cache evicts least recently used entries"""
+    selector = ContextSelector(cache_size=2)
+
+    for version in range(5):
+        selector.select(sample_messages, "recent", cache_key=("c", version))
+
+    assert len(selector._cache) == 2
+
+
+def _reference_token_limit(selector, messages, max_tokens, mode):
+    """Straightforward quadratic trimming, used to check the linear scan"""
+    if not messages or selector.estimate_tokens(messages) <= max_tokens:
+        return messages
+    if mode == "smart" and len(messages) > 1:
+        for i in range(len(messages) - 1, 0, -1):
+            candidate = [messages[0]] + messages[-i:]
+            if selector.estimate_tokens(candidate) <= max_tokens:
+                return candidate
+    for i in range(len(messages), 0, -1):
+        if selector.estimate_tokens(messages[-i:]) <= max_tokens:
+            return messages[-i:]
+    return []
+
+
+@pytest.mark.parametrize("mode", ["smart", "recent", "full", "minimal"])
+def test_token_limit_matches_reference(context_selector, mode):
+    """Test that token trimming keeps the same messages as a brute-force search"""
+    rng = random.Random(1234)
+
+    for _ in range(200):
+        messages = [
+            {"turn": i, "speaker": "s" * rng.randint(0, 8), "content": "x" * n}
+            for i, n in enumerate(rng.choices(range(120), k=rng.randint(1, 15)))
+        ]
+        max_tokens = rng.randint(0, 200)
+
+        assert context_selector._apply_token_limit(
+            messages, max_tokens, mode
+        ) == _reference_token_limit(context_selector, messages, max_tokens, mode)
+
+
+def test_select_with_max_tokens(context_selector):
+    """Test that smart selection keeps the first message under a token limit"""
+    messages = [{"turn": i, "speaker": "user", "content": "x" * 40} for i in range(12)]
+
+    selected = context_selector.select(messages, "smart", max_tokens=40)
+
+    # Each message is 48 chars (12 tokens): first + last two fit in 40 tokens
+    assert [m["turn"] for m in selected] == [0, 10, 11]
+
+
+def test_estimate_one_is_memoized(context_selector):
+    """Test that per-message size estimates are cached per message object"""
+    msg = {"speaker": "user", "content": "x" * 20}
+
+    assert context_selector.estimate_one(msg) == 28
+    assert context_selector.estimate_tokens([msg, msg]) == 14
+
+    # Cached until cleared
+    msg["content"] = "x" * 40
+    assert context_selector.estimate_one(msg) == 28
+    context_selector.clear_cache()
+    assert context_selector.estimate_one(msg) == 48
+
+
+@pytest.mark.asyncio
+async def test_filter_relevant(context_selector, sample_messages):
+    """Test that the filter LLM's numbered reply picks the kept messages"""
+    prompts = []
+
+    async def ask(prompt):
+        prompts.append(prompt)
+        return "Relevant: 3, 1"
+
+    kept = await context_selector.filter_relevant(
+        sample_messages, "New question", ask, cache_key="conv"
+    )
+    assert kept == [sample_messages[0], sample_messages[2]]
+    assert "[2] assistant: First response" in prompts[0]
+    assert prompts[0].endswith("New message: New question")
+
+    # The decision is reused for the same messages and query
+    again = await context_selector.filter_relevant(
+        sample_messages, "New question", ask, cache_key="conv"
+    )
+    assert again == kept
+    assert len(prompts) == 1
+
+
+@pytest.mark.asyncio
+async def test_filter_relevant_fallbacks(context_selector, sample_messages):
+    """Test that unusable filter replies keep the full selection"""
+
+    async def failing(prompt):
+        raise RuntimeError("adapter down")
+
+    async def rambling(prompt):
+        return "I am not sure what you mean"
+
+    async def nothing(prompt):
+        return "None"
+
+    for ask in (failing, rambling):
+        kept = await context_selector.filter_relevant(sample_messages, "Q", ask)
+        assert kept == sample_messages
+
+    assert await context_selector.filter_relevant(sample_messages, "Q", nothing) == []
+
+    # Without a query there is nothing to filter against
+    assert await context_selector.filter_relevant(sample_messages, "", nothing) == (
+        sample_messages
+    )
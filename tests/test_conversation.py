@@ -1,6 +1,10 @@
 """Tests for conversation management"""
 
+import json
+import os
+
 import pytest
+from mcp_llm_bridge import conversation
 from mcp_llm_bridge.conversation import ConversationManager
 
 
@@ -36,6 +40,18 @@ def test_create_conversation_duplicate(temp_conv_manager):
         temp_conv_manager.create_conversation("test", "Another")
 
 
+def test_conversation_deleted_externally(temp_conv_manager):
+    """Test that a conversation removed by another process stops existing"""
+    temp_conv_manager.create_conversation("test", "Hello")
+    assert temp_conv_manager.conversation_exists("test")
+
+    temp_conv_manager._get_conversation_path("test").unlink()
+
+    assert not temp_conv_manager.conversation_exists("test")
+    temp_conv_manager.create_conversation("test", "Again")
+    assert temp_conv_manager.read_messages("test")[0]["content"] == "Again"
+
+
 def test_append_message(temp_conv_manager):
     """Test appending messages"""
     conv_id = temp_conv_manager.create_conversation(initial_message="Hi")
@@ -48,6 +64,120 @@ def test_append_message(temp_conv_manager):
     assert len(messages) == 2
     assert messages[1]["speaker"] == "assistant"
     assert messages[1]["content"] == "Hello back!"
+    metadata = temp_conv_manager.get_metadata(conv_id)
+    assert metadata["updated_at"] == messages[1]["timestamp"]
+
+
+def test_append_message_turn_numbers(temp_conv_manager):
+    """Test that turns stay sequential, including after external writes"""
+    conv_id = temp_conv_manager.create_conversation(initial_message="Hi")
+    temp_conv_manager.append_message(conv_id, "assistant", "Hello")
+
+    # Another writer appends directly to the file
+    conv_path = temp_conv_manager._get_conversation_path(conv_id)
+    with open(conv_path, "a", encoding="utf-8") as f:
+        f.write('{"turn": 3, "speaker": "other", "content": "External"}\n')
+
+    temp_conv_manager.append_message(conv_id, "assistant", "Again")
+
+    messages = temp_conv_manager.read_messages(conv_id)
+    assert [m["turn"] for m in messages] == [1, 2, 3, 4]
+
+
+def test_append_messages_bulk(temp_conv_manager):
+    """Test that several messages are appended with one write"""
+    conv_id = temp_conv_manager.create_conversation(initial_message="Start")
+    temp_conv_manager.read_messages(conv_id)  # warm the read cache
+
+    temp_conv_manager.append_messages(
+        conv_id,
+        [
+            {"speaker": "gpt", "content": "A", "metadata": {"tokens": 1}},
+            {"speaker": "claude", "content": "B"},
+            {"speaker": "gpt", "content": "C"},
+        ],
+    )
+
+    messages = temp_conv_manager.read_messages(conv_id)
+    assert [m["turn"] for m in messages] == [1, 2, 3, 4]
+    assert [m["content"] for m in messages] == ["Start", "A", "B", "C"]
+    assert messages[1]["metadata"] == {"tokens": 1}
+    assert messages[2]["metadata"] == {}
+
+    # The cached and on-disk views agree
+    assert (
+        ConversationManager(temp_conv_manager.conversation_dir).read_messages(conv_id)
+        == messages
+    )
+
+    metadata = temp_conv_manager.get_metadata(conv_id)
+    assert metadata["message_count"] == 4
+    assert metadata["participants"] == ["host", "gpt", "claude"]
+
+
+def test_version_changes_on_append(temp_conv_manager):
+    """Test that the conversation version is bumped by each append"""
+    conv_id = temp_conv_manager.create_conversation()
+    assert temp_conv_manager.get_version(conv_id) == 0
+
+    temp_conv_manager.append_message(conv_id, "user", "One")
+    temp_conv_manager.append_message(conv_id, "user", "Two")
+
+    assert temp_conv_manager.get_version(conv_id) == 2
+    assert temp_conv_manager.get_version("other") == 0
+
+
+def test_fsync_modes(tmp_path, monkeypatch):
+    """Test that fsync_mode controls when appends are synced"""
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: synced.append(fd) or real_fsync(fd))
+
+    always = ConversationManager(tmp_path / "always", fsync_mode="always")
+    conv_id = always.create_conversation(initial_message="Hello")
+    assert synced  # every write synced immediately
+
+    synced.clear()
+    batch = ConversationManager(tmp_path / "batch", fsync_interval=60)
+    conv_id = batch.create_conversation(initial_message="Hello")
+    batch.append_message(conv_id, "user", "Again")
+    assert synced == []
+    batch.flush()
+    assert len(synced) == 2  # conversation and metadata files, once each
+    assert len(batch.read_messages(conv_id)) == 2
+
+    synced.clear()
+    none = ConversationManager(tmp_path / "none", fsync_mode="none")
+    none.create_conversation(initial_message="Hello")
+    none.flush()
+    assert synced == []
+
+    with pytest.raises(ValueError):
+        ConversationManager(tmp_path / "bad", fsync_mode="sometimes")
+
+
+def test_deferred_metadata_writes(tmp_path):
+    """Test that deferred metadata is served from memory and written on flush"""
+    manager = ConversationManager(tmp_path, metadata_flush_interval=60)
+    conv_id = manager.create_conversation(initial_message="Hello")
+    meta_path = manager._get_metadata_path(conv_id)
+    on_disk = json.loads(meta_path.read_text())
+
+    manager.append_message(conv_id, "gpt", "Hi")
+    manager.append_message(conv_id, "claude", "Hey")
+
+    # Not rewritten yet, but visible through the manager
+    assert json.loads(meta_path.read_text()) == on_disk
+    metadata = manager.get_metadata(conv_id)
+    assert metadata["message_count"] == 3
+    assert metadata["participants"] == ["host", "gpt", "claude"]
+    assert manager.list_conversations()[0]["message_count"] == 3
+
+    manager.flush()
+    assert json.loads(meta_path.read_text()) == metadata
+
+    # A fresh manager sees the flushed state
+    assert ConversationManager(tmp_path).get_metadata(conv_id) == metadata
 
 
 def test_read_messages_with_slicing(temp_conv_manager):
@@ -63,6 +193,118 @@ def test_read_messages_with_slicing(temp_conv_manager):
     assert messages[2]["content"] == "Message 2"
 
 
+@pytest.mark.parametrize("chunk_size", [7, 64, 64 * 1024])
+def test_read_messages_tail(temp_conv_manager, monkeypatch, chunk_size):
+    """Test that negative slices parse only the tail yet match a full read"""
+    monkeypatch.setattr(conversation, "TAIL_CHUNK_SIZE", chunk_size)
+    conv_id = temp_conv_manager.create_conversation(initial_message="Start")
+    for i in range(6):
+        temp_conv_manager.append_message(conv_id, f"user{i}", f"Message {i} é")
+
+    # Blank and corrupted lines are skipped, as in a full read
+    conv_path = temp_conv_manager._get_conversation_path(conv_id)
+    with open(conv_path, "a", encoding="utf-8") as f:
+        f.write("\n  \r\n{not json\n")
+    temp_conv_manager.append_message(conv_id, "last", "Final")
+
+    full = temp_conv_manager.read_messages(conv_id)
+    assert len(full) == 8
+
+    for start in range(-10, 0):
+        for end in (None, -1, -3):
+            assert (
+                temp_conv_manager.read_messages(conv_id, start, end)
+                == (full[start:end])
+            )
+
+
+def test_message_count_skips_corrupted_lines(temp_conv_manager):
+    """Test that turn numbers and message_count ignore unreadable lines"""
+    conv_id = temp_conv_manager.create_conversation(initial_message="Start")
+    conv_path = temp_conv_manager._get_conversation_path(conv_id)
+    with open(conv_path, "a", encoding="utf-8") as f:
+        f.write("{not json\n")
+
+    temp_conv_manager.append_message(conv_id, "user", "Second")
+
+    messages = temp_conv_manager.read_messages(conv_id)
+    assert [m["turn"] for m in messages] == [1, 2]
+    assert temp_conv_manager.get_metadata(conv_id)["message_count"] == 2
+
+    # A manager counting from scratch agrees
+    fresh = ConversationManager(temp_conv_manager.conversation_dir)
+    fresh.append_message(conv_id, "user", "Third")
+    assert [m["turn"] for m in fresh.read_messages(conv_id)] == [1, 2, 3]
+
+
+def test_read_messages_stops_at_end(temp_conv_manager):
+    """Test that a forward slice matches a full read"""
+    conv_id = temp_conv_manager.create_conversation(initial_message="Start")
+    for i in range(5):
+        temp_conv_manager.append_message(conv_id, "user", f"Message {i}")
+
+    full = temp_conv_manager.read_messages(conv_id)
+    assert temp_conv_manager.read_messages(conv_id, end=2) == full[:2]
+    assert temp_conv_manager.read_messages(conv_id, start=2, end=10) == full[2:]
+
+
+def test_read_messages_cached_until_file_changes(temp_conv_manager):
+    """Test that full reads are reused, extended by appends, and refreshed"""
+    conv_id = temp_conv_manager.create_conversation(initial_message="Start")
+    temp_conv_manager.append_message(conv_id, "user", "One")
+
+    first = temp_conv_manager.read_messages(conv_id)
+    second = temp_conv_manager.read_messages(conv_id)
+    assert second == first
+    assert second is not first  # callers get their own list
+    assert second[0] is first[0]  # of the same parsed messages
+
+    # Appends through the manager extend the cached list
+    temp_conv_manager.append_message(conv_id, "user", "Two")
+    messages = temp_conv_manager.read_messages(conv_id)
+    assert [m["content"] for m in messages] == ["Start", "One", "Two"]
+    assert messages[0] is first[0]
+
+    # Outside writes are picked up
+    conv_path = temp_conv_manager._get_conversation_path(conv_id)
+    with open(conv_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"turn": 4, "speaker": "x", "content": "Three"}) + "\n")
+    messages = temp_conv_manager.read_messages(conv_id)
+    assert [m["content"] for m in messages] == ["Start", "One", "Two", "Three"]
+
+
+def test_legacy_json_migrated_once(temp_conv_manager, monkeypatch):
+    """Test that legacy JSON is converted to JSONL on first access only"""
+    conv_dir = temp_conv_manager.conversation_dir
+    legacy = [
+        {"turn": 1, "speaker": "user", "content": "Hi", "timestamp": "t1"},
+        {"turn": 2, "speaker": "gpt", "content": "Hello", "timestamp": "t2"},
+    ]
+    (conv_dir / "old.json").write_text(json.dumps(legacy))
+
+    assert temp_conv_manager.read_messages("old") == legacy
+    assert (conv_dir / "old.jsonl").exists()
+    assert (conv_dir / "old.json.bak").exists()
+    assert not (conv_dir / "old.json").exists()
+
+    # Later calls skip the filesystem checks entirely
+    def fail_exists(self):
+        raise AssertionError("unexpected exists() call")
+
+    monkeypatch.setattr(type(conv_dir), "exists", fail_exists)
+    temp_conv_manager._migrate_if_needed("old")
+
+
+def test_corrupted_legacy_json_not_migrated(temp_conv_manager):
+    """Test that an unreadable legacy file leaves no partial JSONL behind"""
+    conv_dir = temp_conv_manager.conversation_dir
+    (conv_dir / "broken.json").write_text('[{"turn": 1, "content": "Hi"}, {"tu')
+
+    assert temp_conv_manager.read_messages("broken") == []
+    assert not (conv_dir / "broken.jsonl").exists()
+    assert (conv_dir / "broken.json").exists()
+
+
 def test_read_messages_nonexistent(temp_conv_manager):
     """Test reading from non-existent conversation"""
     messages = temp_conv_manager.read_messages("nonexistent")
@@ -83,6 +325,20 @@ def test_get_metadata(temp_conv_manager):
     assert metadata["status"] == "active"
 
 
+def test_get_metadata_cached_until_file_changes(temp_conv_manager):
+    """Test that metadata is reused until the metadata file changes on disk"""
+    conv_id = temp_conv_manager.create_conversation(initial_message="Test")
+
+    first = temp_conv_manager.get_metadata(conv_id)
+    assert temp_conv_manager.get_metadata(conv_id) is first
+
+    # An outside edit to the metadata file is picked up
+    meta_path = temp_conv_manager._get_metadata_path(conv_id)
+    meta_path.write_text(json.dumps({**first, "topic": "Edited elsewhere"}))
+
+    assert temp_conv_manager.get_metadata(conv_id)["topic"] == "Edited elsewhere"
+
+
 def test_get_metadata_generate_from_file(temp_conv_manager):
     """Test generating metadata from conversation file"""
     conv_id = temp_conv_manager.create_conversation(initial_message="First")
@@ -95,8 +351,27 @@ def test_get_metadata_generate_from_file(temp_conv_manager):
 
     metadata = temp_conv_manager.get_metadata(conv_id)
     assert metadata["message_count"] == 2
-    assert "host" in metadata["participants"]
-    assert "assistant" in metadata["participants"]
+    # Participants are listed in order of first appearance
+    assert metadata["participants"] == ["host", "assistant"]
+
+
+def test_cached_summary_round_trip(temp_conv_manager):
+    """Test storing and reading back a conversation summary"""
+    conv_id = temp_conv_manager.create_conversation(initial_message="Hello")
+    assert temp_conv_manager.get_cached_summary(conv_id) is None
+
+    messages = temp_conv_manager.read_messages(conv_id)
+    temp_conv_manager.save_summary(conv_id, "A greeting", messages, "qwen")
+
+    assert temp_conv_manager.get_cached_summary(conv_id) == {
+        "summary": "A greeting",
+        "message_count": 1,
+        "last_timestamp": messages[0]["timestamp"],
+        "adapter": "qwen",
+    }
+
+    # Summaries are not mistaken for conversations
+    assert [c["id"] for c in temp_conv_manager.list_conversations()] == [conv_id]
 
 
 def test_list_conversations(temp_conv_manager):
@@ -111,6 +386,76 @@ def test_list_conversations(temp_conv_manager):
     assert any(c["id"] == "conv2" for c in conversations)
 
 
+def test_list_conversations_uses_listing_index(tmp_path, monkeypatch):
+    """Test that a new manager lists from the index without reopening metadata"""
+    writer = ConversationManager(tmp_path)
+    writer.create_conversation("conv1", "Message 1")
+    writer.create_conversation("conv2", "Message 2")
+    expected = writer.list_conversations()
+
+    reader = ConversationManager(tmp_path)
+    read_paths = []
+    real_open = open
+
+    def tracking_open(path, *args, **kwargs):
+        read_paths.append(os.path.basename(path))
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", tracking_open)
+    assert reader.list_conversations() == expected
+    assert read_paths == [conversation.LISTING_INDEX_NAME]
+
+    # An outside edit to one metadata file is still picked up
+    meta_path = writer._get_metadata_path("conv1")
+    edited = {**writer.get_metadata("conv1"), "topic": "Edited elsewhere"}
+    meta_path.write_text(json.dumps(edited))
+    read_paths.clear()
+    topics = {c["id"]: c["topic"] for c in reader.list_conversations()}
+    assert topics["conv1"] == "Edited elsewhere"
+    assert "conv1.json" in read_paths and "conv2.json" not in read_paths
+
+
+def test_listing_index_not_rewritten_for_own_appends(temp_conv_manager):
+    """Test that appends alone don't make each listing rewrite the index"""
+    conv_id = temp_conv_manager.create_conversation("conv1", "Message 1")
+    temp_conv_manager.list_conversations()
+    index_path = temp_conv_manager.metadata_dir / conversation.LISTING_INDEX_NAME
+    written = index_path.stat().st_mtime_ns
+
+    temp_conv_manager.append_message(conv_id, "user", "More")
+    assert temp_conv_manager.list_conversations()[0]["message_count"] == 2
+    assert index_path.stat().st_mtime_ns == written
+
+    # The outdated entry is caught by its stat key in the next process
+    reader = ConversationManager(temp_conv_manager.conversation_dir)
+    assert reader.list_conversations()[0]["message_count"] == 2
+
+
+@pytest.mark.parametrize(
+    "index",
+    [
+        [],
+        "not an index",
+        {"conv1": [1, 2]},
+        {"conv1": None},
+        {"conv1": "abc"},
+        {"conv1": ["x", 2, {}]},
+        {"conv1": [1, 2, "not metadata"]},
+    ],
+)
+def test_malformed_listing_index_ignored(temp_conv_manager, index):
+    """Test that a listing index with the wrong shape is treated as absent"""
+    temp_conv_manager.create_conversation("conv1", "Message 1")
+    index_path = temp_conv_manager.metadata_dir / conversation.LISTING_INDEX_NAME
+    index_path.write_text(json.dumps(index))
+
+    reader = ConversationManager(temp_conv_manager.conversation_dir)
+    assert [c["id"] for c in reader.list_conversations()] == ["conv1"]
+
+    # A usable index replaces it
+    assert json.loads(index_path.read_text())["conv1"][2]["id"] == "conv1"
+
+
 def test_list_conversations_sorting(temp_conv_manager):
     """Test listing conversations with sorting"""
     # Create conversations with different timestamps
@@ -142,6 +487,41 @@ def test_list_conversations_limit(temp_conv_manager):
     assert len(conversations) == 3
 
 
+@pytest.mark.parametrize("parallel_min", [0, 100])
+def test_list_conversations_matches_full_sort(
+    temp_conv_manager, monkeypatch, parallel_min
+):
+    """Test that limited listing returns the head of the fully sorted list"""
+    # Exercise both the thread pool and the serial metadata loads
+    monkeypatch.setattr(conversation, "PARALLEL_METADATA_MIN", parallel_min)
+    for i in range(6):
+        conv_id = temp_conv_manager.create_conversation(f"conv{i}", "Hi")
+        for _ in range(i % 3):
+            temp_conv_manager.append_message(conv_id, "user", "More")
+
+    # An unmigrated legacy conversation is listed too
+    legacy = [{"turn": 1, "speaker": "user", "content": "Old", "timestamp": "t"}]
+    (temp_conv_manager.conversation_dir / "legacy.json").write_text(json.dumps(legacy))
+
+    # A fresh manager has nothing cached, so every metadata file is parsed
+    reader = ConversationManager(temp_conv_manager.conversation_dir)
+    everything = reader.list_conversations(limit=100)
+    assert len(everything) == 7
+
+    for order in ("asc", "desc"):
+        expected = sorted(
+            everything,
+            key=lambda c: c["message_count"],
+            reverse=order == "desc",
+        )[:4]
+        result = reader.list_conversations(
+            limit=4, sort_by="message_count", order=order
+        )
+        assert [c["message_count"] for c in result] == [
+            c["message_count"] for c in expected
+        ]
+
+
 def test_conversation_id_sanitization(temp_conv_manager):
     """Test that conversation IDs are properly sanitized"""
     dangerous_id = "../../../etc/passwd"
@@ -155,6 +535,12 @@ def test_conversation_id_sanitization(temp_conv_manager):
     conv_id = temp_conv_manager.create_conversation(safe_id, "Test")
     assert conv_id == safe_id
 
+    # Unsafe characters are dropped, separators reject the whole ID
+    assert temp_conv_manager._sanitize_id("my conv!.v2") == "myconv.v2"
+    assert temp_conv_manager._sanitize_id("gespräch_1") == "gespräch_1"
+    assert temp_conv_manager._sanitize_id("back\\slash") == ""
+    assert temp_conv_manager._sanitize_id("nul\x00byte") == ""
+
 
 def test_empty_conversation_metadata(temp_conv_manager):
     """Test metadata for empty conversation"""
@@ -7,11 +7,10 @@ from mcp_llm_bridge.adapters import AdapterManager
 from mcp_llm_bridge.context_selector import ContextSelector
 
 
-@pytest.fixture
-def integration_setup(tmp_path):
-    """Set up all components for integration testing"""
-    conv_dir = tmp_path / "conversations"
-    adapter_config = tmp_path / "adapters.json"
+@pytest.fixture(scope="session")
+def shared_adapter_manager(tmp_path_factory):
+    """Adapter manager over a static config, written and loaded once per session"""
+    adapter_config = tmp_path_factory.mktemp("cfg") / "adapters.json"
 
     # Create simple adapter config
     config = {
@@ -38,11 +37,17 @@ def integration_setup(tmp_path):
     with open(adapter_config, "w") as f:
         json.dump(config, f)
 
-    conv_manager = ConversationManager(conv_dir)
-    adapter_manager = AdapterManager(adapter_config)
+    return AdapterManager(adapter_config)
+
+
+@pytest.fixture
+def integration_setup(tmp_path, shared_adapter_manager):
+    """Set up all components for integration testing"""
+    # Only conversation state needs isolating between tests
+    conv_manager = ConversationManager(tmp_path / "conversations")
     context_selector = ContextSelector()
 
-    return conv_manager, adapter_manager, context_selector
+    return conv_manager, shared_adapter_manager, context_selector
 
 
 @pytest.mark.asyncio
@@ -128,10 +133,10 @@ async def test_multi_turn_conversation(integration_setup):
     assert all_messages[2]["speaker"] == "echo"
 
 
-@pytest.mark.asyncio
-async def test_context_modes_in_integration(integration_setup):
-    """Test different context modes in integration"""
-    conv_manager, adapter_manager, context_selector = integration_setup
+@pytest.fixture(scope="module")
+def five_message_history(tmp_path_factory):
+    """Messages of one five-message conversation, built once for all modes"""
+    conv_manager = ConversationManager(tmp_path_factory.mktemp("modes"))
 
     # Create conversation with multiple messages
     conv_id = conv_manager.create_conversation(initial_message="Question 1")
@@ -140,30 +145,30 @@ async def test_context_modes_in_integration(integration_setup):
     conv_manager.append_message(conv_id, "assistant2", "Answer 2")
     conv_manager.append_message(conv_id, "user", "Question 3")
 
-    # Test different context modes
-    all_messages = conv_manager.read_messages(conv_id)
-
-    # Full mode
-    full_selected = context_selector.select(all_messages, "full")
-    assert len(full_selected) == 5
-
-    # Recent mode (all messages since < 10)
-    recent_selected = context_selector.select(all_messages, "recent")
-    assert len(recent_selected) == 5
-
-    # Smart mode (first + last 5 = all 5)
-    smart_selected = context_selector.select(all_messages, "smart")
-    assert len(smart_selected) == 5
-    assert smart_selected[0]["content"] == "Question 1"
-
-    # Minimal mode
-    minimal_selected = context_selector.select(all_messages, "minimal")
-    assert len(minimal_selected) == 1
-    assert minimal_selected[0]["content"] == "Question 3"
+    return conv_manager.read_messages(conv_id)
+
+
+@pytest.mark.parametrize(
+    "mode,expected_count,expected_first",
+    [
+        ("full", 5, "Question 1"),
+        # Recent mode (all messages since < 10)
+        ("recent", 5, "Question 1"),
+        # Smart mode (first + last 5 = all 5)
+        ("smart", 5, "Question 1"),
+        ("minimal", 1, "Question 3"),
+        ("none", 0, None),
+    ],
+)
+def test_context_modes_in_integration(
+    five_message_history, mode, expected_count, expected_first
+):
+    """Test different context modes in integration"""
+    selected = ContextSelector().select(five_message_history, mode)
 
-    # None mode
-    none_selected = context_selector.select(all_messages, "none")
-    assert len(none_selected) == 0
+    assert len(selected) == expected_count
+    if expected_first is not None:
+        assert selected[0]["content"] == expected_first
 
 
 @pytest.mark.asyncio
@@ -241,9 +246,8 @@ async def test_list_conversations_with_activity(integration_setup):
     assert conversations[1]["message_count"] == 1
 
 
-@pytest.mark.asyncio
-async def test_adapter_history_formatting(integration_setup):
-    """Test that history is properly formatted for adapters"""
+def test_adapter_history_formatting(integration_setup):
+    """Test that stored history is properly formatted for adapters"""
     conv_manager, adapter_manager, context_selector = integration_setup
 
     # Create conversation with structured messages
@@ -251,40 +255,15 @@ async def test_adapter_history_formatting(integration_setup):
     conv_manager.append_message(conv_id, "assistant", "Response 1")
     conv_manager.append_message(conv_id, "user", "Follow up")
 
-    # Use cat adapter to see formatted output
-    cat_config = {
-        "adapters": {
-            "cat": {
-                "type": "bash",
-                "command": "cat",
-                "args": [],
-                "input_method": "stdin",
-                "description": "Cat adapter",
-            }
-        }
-    }
-
-    config_path = adapter_manager.config_path.parent / "cat_config.json"
-    with open(config_path, "w") as f:
-        json.dump(cat_config, f)
-
-    cat_manager = AdapterManager(config_path)
-
     messages = conv_manager.read_messages(conv_id)
     selected = context_selector.select(messages, "smart")
 
-    result = await cat_manager.call_adapter(
-        adapter_name="cat",
-        message="New message",
-        conversation_history=selected,
-        pass_history=True,
-    )
+    # Check the text bash adapters receive on stdin; feeding it through a
+    # subprocess is covered by test_adapters
+    history_text = adapter_manager.format_history(selected)
 
     # Should contain formatted history in compact format
-    assert "host: Initial" in result["response"]
-    assert "assistant: Response 1" in result["response"]
-    assert "user: Follow up" in result["response"]
-    assert "New message" in result["response"]
+    assert history_text == "host: Initial | assistant: Response 1 | user: Follow up"
 
 
 def test_component_initialization(integration_setup):
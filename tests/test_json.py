@@ -0,0 +1,43 @@
+"""Tests for JSON encoding helpers"""
+
+import pytest
+
+from mcp_llm_bridge._json import JSONDecodeError, dumps, loads
+
+
+def test_dumps_returns_utf8_bytes():
+    """Test that dumps returns UTF-8 bytes without escaping non-ASCII"""
+    data = dumps({"content": "héllo ✅"})
+
+    assert isinstance(data, bytes)
+    assert "héllo ✅".encode() in data
+
+
+def test_round_trip():
+    """Test that loads reverses dumps for both bytes and str input"""
+    obj = {"turn": 1, "speaker": "user", "metadata": {"tags": ["a", "b"]}}
+
+    assert loads(dumps(obj)) == obj
+    assert loads(dumps(obj).decode("utf-8")) == obj
+    assert loads(dumps(obj, indent=True)) == obj
+
+
+def test_indent_output():
+    """Test that indent produces multi-line output"""
+    assert b"\n" in dumps({"a": 1}, indent=True)
+    assert b"\n" not in dumps({"a": 1})
+
+
+def test_newline_output():
+    """Test that newline appends exactly one trailing newline"""
+    line = dumps({"a": "b\nc"}, newline=True)
+
+    assert line.endswith(b"\n")
+    assert line.count(b"\n") == 1
+    assert loads(line) == {"a": "b\nc"}
+
+
+def test_loads_invalid_raises_json_decode_error():
+    """Test that invalid input raises JSONDecodeError"""
+    with pytest.raises(JSONDecodeError):
+        loads(b"{not json")
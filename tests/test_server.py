@@ -1,11 +1,46 @@
 """Tests for MCP server implementation and API compatibility"""
 
+import asyncio
 import pytest
 import json
-import tempfile
-import shutil
 from pathlib import Path
 
+from mcp_llm_bridge.adapters import AdapterManager
+from mcp_llm_bridge.context_selector import ContextSelector
+from mcp_llm_bridge.conversation import ConversationManager
+
+
+@pytest.fixture
+def tool_env(tmp_path, monkeypatch):
+    """Point the server tools at a temporary store and in-process adapters"""
+    from mcp_llm_bridge import server
+
+    conv = ConversationManager(tmp_path / "conversations")
+    monkeypatch.setattr(server, "conversation_manager", conv)
+    monkeypatch.setattr(server, "context_selector", ContextSelector())
+
+    def use_adapters(adapters, **settings):
+        config = {
+            "adapters": {
+                name: {
+                    "type": "python_callable",
+                    "module": "builtins",
+                    "function": "str",
+                }
+                for name in adapters
+            },
+            **settings,
+        }
+        config_path = tmp_path / "adapters.json"
+        config_path.write_text(json.dumps(config))
+        manager = AdapterManager(config_path)
+        for name, func in adapters.items():
+            manager.adapters[name]._callable = func
+        monkeypatch.setattr(server, "adapter_manager", manager)
+        return manager
+
+    return server, conv, use_adapters
+
 
 def test_server_imports():
     """Test that the server module can be imported without errors"""
@@ -103,51 +138,44 @@ def test_server_module_execution():
 
 
 @pytest.mark.asyncio
-async def test_server_component_functionality():
+async def test_server_component_functionality(tmp_path):
     """Test that server components are functional"""
     from mcp_llm_bridge.server import conversation_manager, adapter_manager
 
     # Test conversation manager
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_path = Path(temp_dir)
-        conv_manager = conversation_manager.__class__(temp_path)
+    conv_manager = conversation_manager.__class__(tmp_path / "conversations")
 
-        # Should be able to create conversation
-        conv_id = conv_manager.create_conversation(initial_message="Test")
-        assert conv_manager.conversation_exists(conv_id)
+    # Should be able to create conversation
+    conv_id = conv_manager.create_conversation(initial_message="Test")
+    assert conv_manager.conversation_exists(conv_id)
 
-        # Should be able to list conversations
-        conversations = conv_manager.list_conversations()
-        assert len(conversations) >= 1
+    # Should be able to list conversations
+    conversations = conv_manager.list_conversations()
+    assert len(conversations) >= 1
 
     # Test adapter manager with temporary config
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
-        config_path = Path(f.name)
-        test_config = {
-            "adapters": {
-                "test-echo": {
-                    "type": "bash",
-                    "command": "echo",
-                    "args": ["test"],
-                    "input_method": "stdin",
-                    "description": "Test echo adapter",
-                }
-            },
-            "default_adapter": "test-echo",
-        }
-        json.dump(test_config, f)
-
-    try:
-        temp_adapter_manager = adapter_manager.__class__(config_path)
-
-        # Should be able to list adapters
-        adapters_info = temp_adapter_manager.list_adapters()
-        assert "adapters" in adapters_info
-        assert len(adapters_info["adapters"]) >= 1
-        assert adapters_info["default_adapter"] == "test-echo"
-
-    finally:
-        config_path.unlink()  # Clean up
+    config_path = tmp_path / "adapters.json"
+    test_config = {
+        "adapters": {
+            "test-echo": {
+                "type": "bash",
+                "command": "echo",
+                "args": ["test"],
+                "input_method": "stdin",
+                "description": "Test echo adapter",
+            }
+        },
+        "default_adapter": "test-echo",
+    }
+    config_path.write_text(json.dumps(test_config))
+
+    temp_adapter_manager = adapter_manager.__class__(config_path)
+
+    # Should be able to list adapters
+    adapters_info = temp_adapter_manager.list_adapters()
+    assert "adapters" in adapters_info
+    assert len(adapters_info["adapters"]) >= 1
+    assert adapters_info["default_adapter"] == "test-echo"
 
 
 def test_fastmcp_api_compatibility():
@@ -204,23 +232,245 @@ def test_tool_signatures():
     # but they should have the expected FunctionTool structure
 
 
-def test_server_error_handling():
+def test_server_error_handling(tmp_path):
     """Test server handles initialization errors gracefully"""
     # Test with invalid configuration paths
 
-    try:
-        # Test that server can handle missing config (should create default)
-        temp_dir = Path(tempfile.mkdtemp())
-        fake_config = temp_dir / "nonexistent" / "adapters.json"
+    # Test that server can handle missing config (should create default)
+    fake_config = tmp_path / "nonexistent" / "adapters.json"
+
+    # This should not raise an exception during import
+    from mcp_llm_bridge.adapters import AdapterManager
+
+    AdapterManager(fake_config)
+
+    # Should create a default config
+    assert fake_config.exists()
+
+
+@pytest.mark.asyncio
+async def test_summarize_conversation_reuses_summary(tool_env):
+    """Test that summaries are cached per adapter and extended incrementally"""
+    server, conv, use_adapters = tool_env
+    prompts = []
+
+    def summarizer(message, history):
+        prompts.append(message)
+        return f"summary {len(prompts)}"
+
+    use_adapters({"sum": summarizer, "other": summarizer})
+    conv_id = conv.create_conversation(initial_message="first")
+    conv.append_message(conv_id, "assistant", "second")
+
+    result = json.loads(await server.summarize_conversation.fn(conv_id, "sum"))
+    assert result["summary"] == "summary 1"
+    assert "first" in prompts[0] and "second" in prompts[0]
+
+    # Unchanged conversation: served from the stored summary
+    result = json.loads(await server.summarize_conversation.fn(conv_id, "sum"))
+    assert result["summary"] == "summary 1"
+    assert len(prompts) == 1
+
+    # Only the new message is sent along with the previous summary
+    conv.append_message(conv_id, "user", "third")
+    result = json.loads(await server.summarize_conversation.fn(conv_id, "sum"))
+    assert result["summary"] == "summary 2"
+    assert result["message_count"] == 3
+    assert "summary 1" in prompts[1] and "third" in prompts[1]
+    assert "first" not in prompts[1] and "second" not in prompts[1]
+
+    # Another adapter does not reuse the summary
+    await server.summarize_conversation.fn(conv_id, "other")
+    assert "first" in prompts[2] and "summary 2" not in prompts[2]
+
+    # refresh skips the stored summary
+    await server.summarize_conversation.fn(conv_id, "other", refresh=True)
+    assert len(prompts) == 4
+    assert "first" in prompts[3] and "summary 3" not in prompts[3]
+
+
+@pytest.mark.asyncio
+async def test_summarize_conversation_rewritten_history(tool_env):
+    """Test that a summary whose last message changed is not reused"""
+    server, conv, use_adapters = tool_env
+    prompts = []
+
+    def summarizer(message, history):
+        prompts.append(message)
+        return f"summary {len(prompts)}"
+
+    use_adapters({"sum": summarizer})
+    conv_id = conv.create_conversation(initial_message="first")
+    await server.summarize_conversation.fn(conv_id, "sum")
+
+    summary_path = conv.summary_dir / f"{conv_id}.json"
+    record = json.loads(summary_path.read_text())
+    record["last_timestamp"] = "2000-01-01T00:00:00"
+    summary_path.write_text(json.dumps(record))
+
+    result = json.loads(await server.summarize_conversation.fn(conv_id, "sum"))
+    assert result["summary"] == "summary 2"
+    assert prompts[1].startswith("Provide a concise summary")
+    assert "summary 1" not in prompts[1]
+
+
+@pytest.mark.asyncio
+async def test_summarize_conversation_empty_summary_not_stored(tool_env):
+    """Test that an empty adapter reply is not kept as the stored summary"""
+    server, conv, use_adapters = tool_env
+    use_adapters({"blank": lambda message, history: "  "})
+    conv_id = conv.create_conversation(initial_message="first")
+
+    result = json.loads(await server.summarize_conversation.fn(conv_id, "blank"))
+
+    assert result["summary"] == ""
+    assert conv.get_cached_summary(conv_id) is None
+
+
+@pytest.mark.asyncio
+async def test_call_llm_parallel_results_in_request_order(tool_env):
+    """Test that results follow adapter_names while appends follow arrival"""
+    server, conv, use_adapters = tool_env
+
+    async def slow(message, history):
+        await asyncio.sleep(0.05)
+        return "slow reply"
+
+    async def fast(message, history):
+        return "fast reply"
+
+    use_adapters({"slow": slow, "fast": fast})
+    conv_id = conv.create_conversation(initial_message="question")
+
+    result = json.loads(
+        await server.call_llm_parallel.fn(conv_id, ["slow", "fast"], "go")
+    )
+
+    assert [r["adapter"] for r in result["results"]] == ["slow", "fast"]
+    assert [r["response"] for r in result["results"]] == ["slow reply", "fast reply"]
+    assert result["successful"] == 2
+    assert result["failed"] == 0
 
-        # This should not raise an exception during import
-        from mcp_llm_bridge.adapters import AdapterManager
+    messages = conv.read_messages(conv_id)
+    assert [(m["turn"], m["speaker"]) for m in messages] == [
+        (1, "host"),
+        (2, "fast"),
+        (3, "slow"),
+    ]
+    assert conv.get_metadata(conv_id)["message_count"] == 3
 
-        AdapterManager(fake_config)
 
-        # Should create a default config
-        assert fake_config.exists()
+@pytest.mark.asyncio
+async def test_call_llm_parallel_mixed_outcomes(tool_env):
+    """Test that adapter errors and unknown adapters are reported, not appended"""
+    server, conv, use_adapters = tool_env
+
+    def broken(message, history):
+        raise RuntimeError("boom")
+
+    use_adapters(
+        {
+            "first": lambda message, history: "one",
+            "broken": broken,
+            "second": lambda message, history: "two",
+        }
+    )
+    conv_id = conv.create_conversation(initial_message="question")
+
+    result = json.loads(
+        await server.call_llm_parallel.fn(
+            conv_id, ["first", "broken", "missing", "second"], "go"
+        )
+    )
 
-    finally:
-        # Clean up temp dir if we created one
-        shutil.rmtree(temp_dir, ignore_errors=True)
+    results = result["results"]
+    assert [r["adapter"] for r in results] == ["first", "broken", "missing", "second"]
+    assert [r["success"] for r in results] == [True, False, False, True]
+    assert results[1]["error"] == "RuntimeError: boom"
+    assert "Unknown adapter" in results[2]["error"]
+    assert result["successful"] == 2
+    assert result["failed"] == 2
+
+    messages = conv.read_messages(conv_id)
+    assert [(m["turn"], m["speaker"], m["content"]) for m in messages] == [
+        (1, "host", "question"),
+        (2, "first", "one"),
+        (3, "second", "two"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_call_llm_parallel_append_failure(tool_env, monkeypatch):
+    """Test that responses which could not be stored are reported as failed"""
+    server, conv, use_adapters = tool_env
+    use_adapters({"first": lambda message, history: "one"})
+    conv_id = conv.create_conversation(initial_message="question")
+
+    def fail(conversation_id, entries):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(conv, "append_messages", fail)
+
+    result = json.loads(await server.call_llm_parallel.fn(conv_id, ["first"], "go"))
+
+    assert result["successful"] == 0
+    assert result["failed"] == 1
+    assert result["results"][0]["success"] is False
+    assert result["results"][0]["error"] == "disk full"
+    assert len(conv.read_messages(conv_id)) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_recent_messages_count(tool_env):
+    """Test that count picks the tail and a non-positive count returns everything"""
+    server, conv, _ = tool_env
+    conv_id = conv.create_conversation(initial_message="one")
+    conv.append_message(conv_id, "user", "two")
+    conv.append_message(conv_id, "assistant", "three")
+
+    assert (
+        await server.get_recent_messages.fn(conv_id, 2)
+        == "[T2]user: two | [T3]assistant: three"
+    )
+    everything = "[T1]host: one | [T2]user: two | [T3]assistant: three"
+    assert await server.get_recent_messages.fn(conv_id, 10) == everything
+    assert await server.get_recent_messages.fn(conv_id, 0) == everything
+    assert await server.get_recent_messages.fn(conv_id, -1) == everything
+
+
+def _failing_filter(message, history):
+    raise RuntimeError("filter down")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "filter_func, expected",
+    [
+        (None, ["one", "two", "three"]),
+        (_failing_filter, ["one", "two", "three"]),
+        (lambda message, history: "1, 3", ["one", "three"]),
+    ],
+    ids=["no-filter", "filter-error", "filter-subset"],
+)
+async def test_call_llm_context_filter(tool_env, filter_func, expected):
+    """Test that the context filter narrows smart history and falls back on failure"""
+    server, conv, use_adapters = tool_env
+    seen = []
+
+    def target(message, history):
+        seen.append([m["content"] for m in history])
+        return "reply"
+
+    adapters = {"target": target}
+    settings = {}
+    if filter_func is not None:
+        adapters["filter"] = filter_func
+        settings["context_filter_adapter"] = "filter"
+    use_adapters(adapters, **settings)
+
+    conv_id = conv.create_conversation(initial_message="one")
+    conv.append_message(conv_id, "user", "two")
+    conv.append_message(conv_id, "assistant", "three")
+
+    assert await server.call_llm.fn(conv_id, "target", "question") == "reply"
+    assert seen == [expected]